@@ -1,139 +1,204 @@
-"""
-Central configuration file for the trading system (BINANCE SPOT).
-
-IMPORTANT:
-- This system CAN place REAL trades on Binance Spot (MAINNET).
-- There is NO leverage and NO margin.
-- You trade actual crypto assets (e.g. ETH, BTC).
-- Misconfiguration can result in real financial loss.
-- You are solely responsible for your account and trades.
-
-Edit ONLY this file to configure the system.
-"""
-
-# ==================================================
-# EXECUTION MODE & SAFETY SWITCHES (MANDATORY)
-# ==================================================
-
-# ENABLE_LIVE_TRADING
-# -------------------
-# This MUST be set to True to allow ANY real order execution
-# on Binance (MAINNET or TESTNET).
-#
-# Set this to True ONLY after:
-# 1. You have reviewed the code
-# 2. You understand the strategy
-# 3. You have configured API credentials correctly
-# 4. You accept the risks of automated trading
-ENABLE_LIVE_TRADING = False
-
-
-# DRY_RUN
-# -------
-# If True:
-# - NO orders are sent to Binance
-# - Strategy runs on REAL market data
-# - Trades are SIMULATED and written to CSV
-# - API keys are NOT required
-#
-# This is the SAFEST way to test the system.
-#
-# Typical usage:
-# - First run:  DRY_RUN = True
-# - Later:      DRY_RUN = False + SPOT_TESTNET
-# - Final:      DRY_RUN = False + SPOT_MAINNET
-DRY_RUN = True
-
-
-# ==================================================
-# Trading Instrument (SPOT)
-# ==================================================
-
-# Binance Spot symbol (examples: ETHUSDT, BTCUSDT)
-SYMBOL = "BTCUSDT"
-
-
-# ==================================================
-# Timeframe Configuration
-# ==================================================
-
-# Base timeframe for execution.
-# The strategy runs exactly once per CLOSED candle.
-ENTRY_TIMEFRAME = "5m"
-
-
-# ==================================================
-# Strategy Parameters
-# ==================================================
-
-# These parameters control ONLY the strategy logic.
-# They do NOT manage risk or capital allocation.
-
-STRATEGY_PARAMS = {
-    "entry_ema": 8,              # EMA period for pullback detection
-    "rsi_period": 14,            # RSI lookback
-    "rsi_entry": 50,             # Minimum RSI for long entry
-    "confirm_ema_fast": 50,      # Fast EMA for higher timeframe trend
-    "confirm_ema_slow": 200,     # Slow EMA for higher timeframe trend
-    "exit_bars": 8,              # Time-based exit (number of bars)
-}
-
-
-# ==================================================
-# Position Sizing (SPOT)
-# ==================================================
-
-# Fixed order quantity per trade.
-# This is an ABSOLUTE quantity of the BASE asset.
-#
-# Example:
-# - SYMBOL = ETHUSDT
-# - POSITION_SIZE = 0.02
-# → Each trade buys/sells 0.02 ETH
-#
-# IMPORTANT:
-# - Ensure you have sufficient balance (MAINNET)
-# - Start with the MINIMUM possible size when testing
-POSITION_SIZE = 0.02
-
-
-# ==================================================
-# Binance Configuration (SPOT)
-# ==================================================
-
-# Supported environments:
-# - SPOT_TESTNET  → Fake money, real execution (RECOMMENDED for testing)
-# - SPOT_MAINNET  → Real money, real execution
-#
-# DRY_RUN overrides execution and prevents ALL orders.
-BINANCE = {
-    "ENV": "SPOT_TESTNET",   # SPOT_TESTNET or SPOT_MAINNET
-
-    # API credentials:
-    # - Required for SPOT_TESTNET and SPOT_MAINNET
-    # - NOT required for DRY_RUN
-    "API_KEY": "",
-    "API_SECRET": "",
-}
-
-# Binance base URLs (DO NOT MODIFY)
-BINANCE_SPOT_MAINNET_URL = "https://api.binance.com"
-BINANCE_SPOT_TESTNET_URL = "https://testnet.binance.vision"
-
-
-# ==================================================
-# Trade Logging
-# ==================================================
-
-# CSV file where completed trades are recorded
-# The file is created automatically if it does not exist
-LIVE_TRADES_CSV = f"data/live_trades_{SYMBOL}.csv"
-
-
-# ==================================================
-# Logging Configuration
-# ==================================================
-
-# Logging level:
-# DEBUG, INFO, WARNING, ERROR
-LOG_LEVEL = "INFO"
+"""
+Central configuration file for the trading system (BINANCE SPOT).
+
+IMPORTANT:
+- This system CAN place REAL trades on Binance Spot (MAINNET).
+- There is NO leverage and NO margin.
+- You trade actual crypto assets (e.g. ETH, BTC).
+- Misconfiguration can result in real financial loss.
+- You are solely responsible for your account and trades.
+
+Edit ONLY this file to configure the system.
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+
+# ==================================================
+# EXECUTION MODE & SAFETY SWITCHES (MANDATORY)
+# ==================================================
+
+# ENABLE_LIVE_TRADING
+# -------------------
+# This MUST be set to True to allow ANY real order execution
+# on Binance (MAINNET or TESTNET).
+#
+# Set this to True ONLY after:
+# 1. You have reviewed the code
+# 2. You understand the strategy
+# 3. You have configured API credentials correctly
+# 4. You accept the risks of automated trading
+ENABLE_LIVE_TRADING = False
+
+
+# DRY_RUN
+# -------
+# If True:
+# - NO orders are sent to Binance
+# - Strategy runs on REAL market data
+# - Trades are SIMULATED and written to CSV
+# - API keys are NOT required
+#
+# This is the SAFEST way to test the system.
+#
+# Typical usage:
+# - First run:  DRY_RUN = True
+# - Later:      DRY_RUN = False + SPOT_TESTNET
+# - Final:      DRY_RUN = False + SPOT_MAINNET
+DRY_RUN = True
+
+
+# ==================================================
+# Trading Instrument (SPOT)
+# ==================================================
+
+# Binance Spot symbol (examples: ETHUSDT, BTCUSDT)
+SYMBOL = "BTCUSDT"
+
+
+# ==================================================
+# Timeframe Configuration
+# ==================================================
+
+# Base timeframe for execution.
+# The strategy runs exactly once per CLOSED candle.
+ENTRY_TIMEFRAME = "5m"
+
+
+# ==================================================
+# Strategy Parameters
+# ==================================================
+
+# These parameters control ONLY the strategy logic.
+# They do NOT manage risk or capital allocation.
+
+STRATEGY_PARAMS = {
+    "entry_ema": 8,              # EMA period for pullback detection
+    "rsi_period": 14,            # RSI lookback
+    "rsi_entry": 50,             # Minimum RSI for long entry
+    "confirm_ema_fast": 50,      # Fast EMA for higher timeframe trend
+    "confirm_ema_slow": 200,     # Slow EMA for higher timeframe trend
+    "exit_bars": 8,              # Time-based exit (number of bars)
+}
+
+
+# ==================================================
+# Position Sizing (SPOT)
+# ==================================================
+
+# Fixed order quantity per trade.
+# This is an ABSOLUTE quantity of the BASE asset.
+#
+# Example:
+# - SYMBOL = ETHUSDT
+# - POSITION_SIZE = 0.02
+# → Each trade buys/sells 0.02 ETH
+#
+# IMPORTANT:
+# - Ensure you have sufficient balance (MAINNET)
+# - Start with the MINIMUM possible size when testing
+POSITION_SIZE = 0.02
+
+
+# ==================================================
+# Binance Configuration (SPOT)
+# ==================================================
+
+# Supported environments:
+# - SPOT_TESTNET  → Fake money, real execution (RECOMMENDED for testing)
+# - SPOT_MAINNET  → Real money, real execution
+#
+# DRY_RUN overrides execution and prevents ALL orders.
+BINANCE = {
+    "ENV": "SPOT_TESTNET",   # SPOT_TESTNET or SPOT_MAINNET
+
+    # API credentials:
+    # - Required for SPOT_TESTNET and SPOT_MAINNET
+    # - NOT required for DRY_RUN
+    "API_KEY": "",
+    "API_SECRET": "",
+}
+
+# Binance base URLs (DO NOT MODIFY)
+BINANCE_SPOT_MAINNET_URL = "https://api.binance.com"
+BINANCE_SPOT_TESTNET_URL = "https://testnet.binance.vision"
+
+
+# ==================================================
+# Trade Logging
+# ==================================================
+
+# CSV file where completed trades are recorded
+# The file is created automatically if it does not exist
+LIVE_TRADES_CSV = f"data/live_trades_{SYMBOL}.csv"
+
+
+# ==================================================
+# Logging Configuration
+# ==================================================
+
+# Logging level:
+# DEBUG, INFO, WARNING, ERROR
+LOG_LEVEL = "INFO"
+
+
+# ==================================================
+# Resolved Settings (DO NOT MODIFY)
+# ==================================================
+
+# Settings are frozen after this point; they are read-only at runtime.
+STRATEGY_PARAMS = MappingProxyType(STRATEGY_PARAMS)
+BINANCE = MappingProxyType(BINANCE)
+
+
+@lru_cache(maxsize=1)
+def resolve_execution():
+    """
+    Validate execution settings once and resolve derived values.
+
+    Single source of truth for the execution mode, BINANCE.ENV and
+    credential checks (also used by validate_config). Raises
+    RuntimeError at import time on an unsafe or ambiguous
+    configuration.
+
+    Returns
+    -------
+    tuple
+        (env, need_keys, api_key, api_secret)
+    """
+    # Prevent ambiguous execution states:
+    # - ENABLE_LIVE_TRADING=False AND DRY_RUN=False is invalid
+    if not ENABLE_LIVE_TRADING and not DRY_RUN:
+        raise RuntimeError(
+            "Invalid execution mode:\n"
+            "- ENABLE_LIVE_TRADING is False\n"
+            "- DRY_RUN is False\n\n"
+            "Enable DRY_RUN for safe testing, or set ENABLE_LIVE_TRADING=True "
+            "for real execution."
+        )
+
+    env = BINANCE.get("ENV")
+
+    if env not in ("SPOT_TESTNET", "SPOT_MAINNET"):
+        raise RuntimeError(
+            f"Invalid BINANCE.ENV: {env}\n"
+            "Valid values: 'SPOT_TESTNET', 'SPOT_MAINNET'."
+        )
+
+    # API keys are required ONLY if orders may be sent
+    need_keys = not DRY_RUN
+
+    api_key = BINANCE.get("API_KEY")
+    api_secret = BINANCE.get("API_SECRET")
+
+    if need_keys and (not api_key or not api_secret):
+        raise RuntimeError(
+            "Binance API credentials missing.\n"
+            "API_KEY and API_SECRET are required for "
+            "Spot execution (TESTNET or MAINNET)."
+        )
+
+    return env, need_keys, api_key, api_secret
+
+
+RESOLVED = resolve_execution()
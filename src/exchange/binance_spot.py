@@ -1,269 +1,456 @@
-"""
-Binance Spot exchange wrapper.
-
-WARNING:
-- This class MAY place REAL orders on Binance Spot.
-- Depending on configuration, this can involve REAL funds.
-- There is NO leverage and NO margin.
-- You trade actual crypto assets on MAINNET.
-- Misconfiguration may result in financial loss.
-
-DESIGN NOTES:
-- Binance Spot TESTNET does NOT support market data (klines).
-- Therefore:
-    * Market data is ALWAYS fetched from Spot MAINNET
-    * Execution environment is controlled by API keys + config
-- python-binance internally handles correct endpoint routing.
-- We DO NOT manually override API_URL.
-
-This class is intentionally strict and fail-fast.
-"""
-
-from typing import List, Dict
-
-from binance.client import Client
-from binance.exceptions import BinanceAPIException
-
-from config.config import (
-    BINANCE,
-    SYMBOL,
-    ENABLE_LIVE_TRADING,
-    DRY_RUN,
-)
-from src.utils.data import normalize_kline
-from src.utils.logger import get_logger
-
-
-class BinanceSpotExchange:
-    """
-    Binance Spot exchange abstraction.
-
-    Responsibilities:
-    - Fetch closed market candles (Spot MAINNET only)
-    - Place market orders (BUY / SELL)
-    - Parse and return execution details
-
-    This class does NOT:
-    - Contain strategy logic
-    - Run execution loops
-    - Manage positions
-    """
-
-    def __init__(self):
-        self.logger = get_logger("EXCHANGE")
-
-        env = BINANCE.get("ENV")
-
-        # ==================================================
-        # Execution safety gates
-        # ==================================================
-
-        # Prevent ambiguous execution states:
-        # - ENABLE_LIVE_TRADING=False AND DRY_RUN=False is invalid
-        if not ENABLE_LIVE_TRADING and not DRY_RUN:
-            raise RuntimeError(
-                "Invalid execution state:\n"
-                "- ENABLE_LIVE_TRADING is False\n"
-                "- DRY_RUN is False\n\n"
-                "Enable DRY_RUN for safe testing or "
-                "set ENABLE_LIVE_TRADING=True for execution."
-            )
-
-        if env not in ("SPOT_TESTNET", "SPOT_MAINNET"):
-            raise RuntimeError(
-                f"Invalid BINANCE.ENV: {env}\n"
-                "Valid values: 'SPOT_TESTNET', 'SPOT_MAINNET'."
-            )
-
-        # ==================================================
-        # API credential checks
-        # ==================================================
-
-        api_key = BINANCE.get("API_KEY")
-        api_secret = BINANCE.get("API_SECRET")
-
-        # API keys are required ONLY if orders may be sent
-        if not DRY_RUN:
-            if not api_key or not api_secret:
-                raise RuntimeError(
-                    "Binance API credentials missing.\n"
-                    "API_KEY and API_SECRET are required for "
-                    "Spot execution (TESTNET or MAINNET)."
-                )
-
-        # ==================================================
-        # Initialize Binance client
-        # ==================================================
-
-        # IMPORTANT:
-        # - python-binance defaults to Spot MAINNET endpoints
-        # - We intentionally DO NOT override API_URL
-        # - Market data (klines) always comes from MAINNET
-        # - Execution environment is determined by API keys
-        self.client = Client(
-            api_key=api_key if not DRY_RUN else None,
-            api_secret=api_secret if not DRY_RUN else None,
-        )
-
-        self.logger.info(
-            "[MARKET DATA] Binance Spot MAINNET (default python-binance routing)"
-        )
-
-        # ==================================================
-        # Execution environment (logging only)
-        # ==================================================
-
-        if env == "SPOT_MAINNET":
-            self.logger.warning(
-                "[EXECUTION] Binance Spot MAINNET (REAL FUNDS)"
-            )
-        else:
-            self.logger.warning(
-                "[EXECUTION] Binance Spot TESTNET (PAPER FUNDS)"
-            )
-
-        if DRY_RUN:
-            self.logger.warning(
-                "[DRY_RUN] Orders will NOT be sent to Binance"
-            )
-
-        self.symbol = SYMBOL
-
-        self.logger.info(
-            f"[EXCHANGE READY] symbol={self.symbol} | env={env}"
-        )
-
-    # ==============================
-    # Market Data
-    # ==============================
-
-    def get_klines(
-        self,
-        interval: str,
-        limit: int = 200,
-    ) -> List[Dict]:
-        """
-        Fetch latest CLOSED klines from Binance Spot MAINNET.
-
-        Notes
-        -----
-        - Spot TESTNET does not provide klines
-        - This method always uses MAINNET implicitly
-        - No API key is required for this call
-
-        Parameters
-        ----------
-        interval : str
-            Binance kline interval (e.g. '5m', '15m')
-        limit : int
-            Number of candles to fetch
-
-        Returns
-        -------
-        List[Dict]
-            List of normalized candle dictionaries
-        """
-        try:
-            klines = self.client.get_klines(
-                symbol=self.symbol,
-                interval=interval,
-                limit=limit,
-            )
-
-            return [normalize_kline(k) for k in klines]
-
-        except BinanceAPIException as e:
-            self.logger.error(f"Failed to fetch klines | {e}")
-            raise RuntimeError("Market data fetch failed") from e
-
-    # ==============================
-    # Order Execution
-    # ==============================
-
-    def place_market_order(
-        self,
-        side: str,
-        quantity: float,
-    ) -> Dict:
-        """
-        Place a market order on Binance Spot.
-
-        In DRY_RUN mode:
-        - No order is sent
-        - A simulated execution is returned
-
-        Parameters
-        ----------
-        side : str
-            'BUY' or 'SELL'
-        quantity : float
-            Quantity of base asset to trade
-
-        Returns
-        -------
-        Dict
-            Executed (or simulated) order information
-        """
-        if side not in ("BUY", "SELL"):
-            raise ValueError(f"Invalid order side: {side}")
-
-        # ==================================================
-        # DRY RUN — simulate execution
-        # ==================================================
-
-        if DRY_RUN:
-            self.logger.warning(
-                f"[DRY_RUN] Simulating market order | side={side} qty={quantity}"
-            )
-
-            return {
-                "symbol": self.symbol,
-                "side": side,
-                "price": None,
-                "executed_qty": quantity,
-                "timestamp": None,
-            }
-
-        # ==================================================
-        # REAL execution (TESTNET or MAINNET)
-        # ==================================================
-
-        try:
-            self.logger.info(
-                f"[ORDER] Placing market order | side={side} qty={quantity}"
-            )
-
-            order = self.client.create_order(
-                symbol=self.symbol,
-                side=side,
-                type="MARKET",
-                quantity=quantity,
-            )
-
-            fills = order.get("fills", [])
-            if not fills:
-                raise RuntimeError("Order executed but no fills returned")
-
-            executed_qty = sum(float(f["qty"]) for f in fills)
-            avg_price = (
-                sum(float(f["price"]) * float(f["qty"]) for f in fills)
-                / executed_qty
-            )
-
-            execution = {
-                "symbol": self.symbol,
-                "side": side,
-                "price": avg_price,
-                "executed_qty": executed_qty,
-                "timestamp": order.get("transactTime"),
-            }
-
-            self.logger.info(
-                f"[ORDER FILLED] side={side} qty={executed_qty} price={avg_price}"
-            )
-
-            return execution
-
-        except BinanceAPIException as e:
-            self.logger.error(f"Order placement failed | {e}")
-            raise RuntimeError("Market order failed") from e
+"""
+Binance Spot exchange wrapper.
+
+WARNING:
+- This class MAY place REAL orders on Binance Spot.
+- Depending on configuration, this can involve REAL funds.
+- There is NO leverage and NO margin.
+- You trade actual crypto assets on MAINNET.
+- Misconfiguration may result in financial loss.
+
+DESIGN NOTES:
+- Binance Spot TESTNET does NOT support market data (klines).
+- Therefore:
+    * Market data is ALWAYS fetched from Spot MAINNET
+    * Execution environment is controlled by API keys + config
+- python-binance internally handles correct endpoint routing.
+- We DO NOT manually override API_URL.
+
+This class is intentionally strict and fail-fast.
+"""
+
+import time
+from typing import AsyncIterator, Dict, Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: faster REST JSON parsing
+    orjson = None
+
+from config.config import (
+    RESOLVED,
+    SYMBOL,
+    DRY_RUN,
+    ENTRY_TIMEFRAME,
+)
+from src.utils.data import (
+    INTERVAL_MS,
+    CandleBuffer,
+    normalize_klines,
+    normalize_stream_kline,
+)
+from src.utils.enums import Side
+from src.utils.logger import get_logger
+
+
+# Idle REST connections are kept for one candle plus this margin,
+# so the once-per-candle fallback poll reuses them.
+_KEEPALIVE_SLACK_S = 30
+
+
+class KlineStreamError(ConnectionError):
+    """
+    The kline WebSocket could not be opened or read.
+
+    Raised only by `stream_closed_klines`, so callers can fall back
+    to REST polling without also catching connection errors from
+    order placement or REST market data.
+    """
+
+
+def _session_params() -> Dict:
+    """
+    aiohttp.ClientSession options for the Binance client.
+
+    - A small keep-alive connection pool; idle connections are kept
+      for one ENTRY_TIMEFRAME candle plus a margin, so the REST
+      fallback (one poll per candle close) does not renegotiate TLS
+    - With orjson installed, responses parse their JSON body with
+      orjson (scoped to this client's session only)
+
+    Must be called inside the running event loop.
+    """
+    import aiohttp
+
+    params = {
+        "connector": aiohttp.TCPConnector(
+            limit=4,
+            keepalive_timeout=(
+                INTERVAL_MS[ENTRY_TIMEFRAME] / 1000 + _KEEPALIVE_SLACK_S
+            ),
+            ttl_dns_cache=300,
+        ),
+    }
+
+    if orjson is not None:
+        class _OrjsonResponse(aiohttp.ClientResponse):
+            async def json(self, *, loads=orjson.loads, **kwargs):
+                return await super().json(loads=loads, **kwargs)
+
+        params["response_class"] = _OrjsonResponse
+
+    return params
+
+
+class _SpotExchangeBase:
+    """
+    Binance Spot exchange abstraction (shared by all execution modes).
+
+    Responsibilities:
+    - Fetch closed market candles (Spot MAINNET only)
+    - Place market orders (BUY / SELL)
+    - Parse and return execution details
+
+    This class does NOT:
+    - Contain strategy logic
+    - Run execution loops
+    - Manage positions
+    """
+
+    def __init__(self):
+        self.logger = get_logger("EXCHANGE")
+
+        # Execution safety gates and credential checks run once
+        # when config is imported (see config.RESOLVED).
+        env, need_keys, api_key, api_secret = RESOLVED
+
+        self._need_keys = need_keys
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self.client = None
+
+        self.logger.info(
+            "[MARKET DATA] Binance Spot MAINNET (default python-binance routing)"
+        )
+
+        # ==================================================
+        # Execution environment (logging only)
+        # ==================================================
+
+        if env == "SPOT_MAINNET":
+            self.logger.warning(
+                "[EXECUTION] Binance Spot MAINNET (REAL FUNDS)"
+            )
+        else:
+            self.logger.warning(
+                "[EXECUTION] Binance Spot TESTNET (PAPER FUNDS)"
+            )
+
+        self.symbol = SYMBOL
+
+        # Constant order fields, built once
+        self._order_template = {"symbol": self.symbol, "type": "MARKET"}
+
+        self.logger.info(
+            "[EXCHANGE READY] symbol=%s | env=%s",
+            self.symbol,
+            env,
+        )
+
+    # ==============================
+    # Connection
+    # ==============================
+
+    async def connect(self) -> None:
+        """
+        Create the async Binance client.
+
+        Must be awaited (inside the running event loop) before any
+        market data or order call.
+        """
+        # python-binance is imported lazily: it pulls in aiohttp,
+        # requests and ssl, which config-only paths never need.
+        from binance import AsyncClient
+        from binance.exceptions import BinanceAPIException
+
+        self._APIException = BinanceAPIException
+
+        # IMPORTANT:
+        # - python-binance defaults to Spot MAINNET endpoints
+        # - We intentionally DO NOT override API_URL
+        # - Market data (klines) always comes from MAINNET
+        # - Execution environment is determined by API keys
+        self.client = await AsyncClient.create(
+            api_key=self._api_key if self._need_keys else None,
+            api_secret=self._api_secret if self._need_keys else None,
+            session_params=_session_params(),
+        )
+
+        # Hot-path client calls, resolved once
+        self._get_klines = self.client.get_klines
+        self._create_order = self.client.create_order
+
+    async def close(self) -> None:
+        """
+        Close the Binance client session.
+        """
+        if self.client is not None:
+            await self.client.close_connection()
+            self.client = None
+
+    # ==============================
+    # Market Data
+    # ==============================
+
+    async def fetch_klines_into(
+        self,
+        buffer: CandleBuffer,
+        interval: str,
+        limit: int = 200,
+        start_time: Optional[int] = None,
+    ) -> int:
+        """
+        Fetch CLOSED klines from Binance Spot MAINNET and parse them
+        straight into a CandleBuffer.
+
+        Only klines that have closed and are newer than the buffer's
+        latest candle are stored.
+
+        Parameters
+        ----------
+        buffer : CandleBuffer
+            Destination column buffer
+        interval : str
+            Binance kline interval (e.g. '5m', '15m')
+        limit : int
+            Number of candles to fetch
+        start_time : int, optional
+            Only return candles opening at or after this
+            timestamp (milliseconds since epoch)
+
+        Returns
+        -------
+        int
+            Number of candles stored
+        """
+        params = {
+            "symbol": self.symbol,
+            "interval": interval,
+            "limit": limit,
+        }
+        if start_time is not None:
+            params["startTime"] = start_time
+
+        try:
+            klines = await self._get_klines(**params)
+        except self._APIException as e:
+            self.logger.error("Failed to fetch klines | %s", e)
+            raise RuntimeError("Market data fetch failed") from e
+
+        # The last kline returned may still be forming
+        now_ms = int(time.time() * 1000)
+
+        rows = normalize_klines(klines)
+        keep = rows["close_time"] < now_ms
+
+        last = buffer.last_close_time
+        if last is not None:
+            keep &= rows["close_time"] > last
+
+        rows = rows[keep]
+        buffer.extend(rows)
+
+        return len(rows)
+
+    async def stream_closed_klines(
+        self,
+        interval: str,
+    ) -> AsyncIterator[Dict | None]:
+        """
+        Stream CLOSED klines from Binance Spot MAINNET over WebSocket.
+
+        Parameters
+        ----------
+        interval : str
+            Binance kline interval (e.g. '5m', '15m')
+
+        Yields
+        ------
+        Dict or None
+            Normalized closed candle, or None when the stream
+            reports an error
+
+        Raises
+        ------
+        KlineStreamError
+            If the WebSocket cannot be opened or read
+        """
+        from binance import BinanceSocketManager
+
+        socket = BinanceSocketManager(self.client).kline_socket(
+            symbol=self.symbol,
+            interval=interval,
+        )
+
+        try:
+            async with socket as stream:
+                self.logger.info(
+                    "[STREAM] Kline stream started | interval=%s",
+                    interval,
+                )
+
+                while True:
+                    msg = await stream.recv()
+
+                    if msg.get("e") == "error":
+                        self.logger.warning("[STREAM] error | %s", msg.get("m"))
+                        yield None
+                        continue
+
+                    kline = msg.get("k")
+
+                    # Only act on closed candles
+                    if kline and kline["x"]:
+                        yield normalize_stream_kline(kline)
+
+        except Exception as e:
+            raise KlineStreamError("Kline stream failed") from e
+
+    # ==============================
+    # Order Execution
+    # ==============================
+
+    @staticmethod
+    def _side_name(side: Side) -> str:
+        """
+        Validate an order side and return its Binance name.
+        """
+        if side.value > 1:
+            raise ValueError(f"Invalid order side: {side.name}")
+
+        return side.name  # Binance expects 'BUY' / 'SELL'
+
+
+class _DryRunExchange(_SpotExchangeBase):
+    """
+    DRY_RUN exchange: real market data, simulated orders.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.logger.warning(
+            "[DRY_RUN] Orders will NOT be sent to Binance"
+        )
+
+    async def place_market_order(
+        self,
+        side: Side,
+        quantity: float,
+    ) -> Dict:
+        """
+        Simulate a market order. No order is sent.
+
+        Parameters
+        ----------
+        side : Side
+            Side.BUY or Side.SELL
+        quantity : float
+            Quantity of base asset to trade
+
+        Returns
+        -------
+        Dict
+            Simulated order information
+        """
+        side = self._side_name(side)
+
+        self.logger.warning(
+            "[DRY_RUN] Simulating market order | side=%s qty=%s",
+            side,
+            quantity,
+        )
+
+        return {
+            "symbol": self.symbol,
+            "side": side,
+            "price": None,
+            "executed_qty": quantity,
+            "timestamp": None,
+        }
+
+
+class _LiveExchange(_SpotExchangeBase):
+    """
+    Live exchange: REAL execution (TESTNET or MAINNET).
+    """
+
+    async def place_market_order(
+        self,
+        side: Side,
+        quantity: float,
+    ) -> Dict:
+        """
+        Place a market order on Binance Spot.
+
+        Parameters
+        ----------
+        side : Side
+            Side.BUY or Side.SELL
+        quantity : float
+            Quantity of base asset to trade
+
+        Returns
+        -------
+        Dict
+            Executed order information
+        """
+        side = self._side_name(side)
+
+        try:
+            self.logger.info(
+                "[ORDER] Placing market order | side=%s qty=%s",
+                side,
+                quantity,
+            )
+
+            order = await self._create_order(
+                side=side,
+                quantity=quantity,
+                **self._order_template,
+            )
+
+            fills = order.get("fills", [])
+            if not fills:
+                raise RuntimeError("Order executed but no fills returned")
+
+            qtys = np.fromiter(
+                (float(f["qty"]) for f in fills),
+                dtype=np.float64,
+                count=len(fills),
+            )
+            prices = np.fromiter(
+                (float(f["price"]) for f in fills),
+                dtype=np.float64,
+                count=len(fills),
+            )
+
+            executed_qty = float(qtys.sum())
+            avg_price = float(np.dot(prices, qtys) / executed_qty)
+
+            execution = {
+                "symbol": self.symbol,
+                "side": side,
+                "price": avg_price,
+                "executed_qty": executed_qty,
+                "timestamp": order.get("transactTime"),
+            }
+
+            self.logger.info(
+                "[ORDER FILLED] side=%s qty=%s price=%s",
+                side,
+                executed_qty,
+                avg_price,
+            )
+
+            return execution
+
+        except self._APIException as e:
+            self.logger.error("Order placement failed | %s", e)
+            raise RuntimeError("Market order failed") from e
+
+
+# Execution mode is fixed at import; pick the implementation once
+BinanceSpotExchange = _DryRunExchange if DRY_RUN else _LiveExchange
@@ -1,255 +1,574 @@
-"""
-Live trading executor for Binance Spot.
-
-IMPORTANT:
-- This executor MAY place REAL trades depending on configuration.
-- Supports DRY_RUN, SPOT_TESTNET, and SPOT_MAINNET.
-- Assumes LONG-ONLY, one position at a time.
-- Assumes NO open position on startup.
-- If the process restarts, the system assumes a FLAT state.
-
-Responsibilities:
-- Fetch closed candles
-- Feed candles bar-by-bar into strategy logic
-- Execute BUY / SELL decisions
-- Persist completed trades to CSV
-"""
-
-import time
-import numpy as np
-from typing import Dict, List
-
-from config.config import (
-    SYMBOL,
-    STRATEGY_PARAMS,
-    POSITION_SIZE,
-    LIVE_TRADES_CSV,
-    ENTRY_TIMEFRAME,
-    ENABLE_LIVE_TRADING,
-    DRY_RUN,
-    BINANCE,
-)
-
-from src.strategy.multi_tf import MultiTFTrendPullbackLogic
-from src.exchange.binance_spot import BinanceSpotExchange
-from src.utils.data import write_trades_to_csv
-from src.utils.logger import get_logger
-from src.validation.config_checks import validate_config
-
-
-class LiveTradingExecutor:
-    """
-    Live execution engine.
-
-    Contract:
-    - One decision per CLOSED candle
-    - Strategy emits intent only ("BUY", "SELL", None)
-    - Executor owns all side effects (orders, state, persistence)
-    """
-
-    def __init__(self, poll_interval_seconds: int = 30):
-        self.logger = get_logger("EXECUTOR")
-
-        # ==================================================
-        # Execution mode logging
-        # ==================================================
-
-        if DRY_RUN:
-            self.logger.warning("[MODE] DRY_RUN enabled — no real orders will be sent")
-        else:
-            self.logger.warning(
-                f"[MODE] LIVE execution enabled | env={BINANCE.get('ENV')}"
-            )
-
-        # ==================================================
-        # Initialize exchange (fail-fast)
-        # ==================================================
-
-        self.exchange = BinanceSpotExchange()
-
-        # ==================================================
-        # Initialize strategy logic
-        # ==================================================
-
-        self.logic = MultiTFTrendPullbackLogic(
-            entry_ema=STRATEGY_PARAMS["entry_ema"],
-            rsi_period=STRATEGY_PARAMS["rsi_period"],
-            rsi_entry=STRATEGY_PARAMS["rsi_entry"],
-            confirm_ema_fast=STRATEGY_PARAMS["confirm_ema_fast"],
-            confirm_ema_slow=STRATEGY_PARAMS["confirm_ema_slow"],
-            exit_bars=STRATEGY_PARAMS["exit_bars"],
-            confirm_tf_multiple=3,  # 15m trend derived from 5m bars
-        )
-
-        # ==================================================
-        # Runtime configuration
-        # ==================================================
-
-        self.poll_interval = poll_interval_seconds
-
-        # ==================================================
-        # Candle state
-        # ==================================================
-
-        self.entry_tf_candles: List[Dict] = []
-        self.last_close_time = None
-
-        # ==================================================
-        # Position & trade tracking
-        # ==================================================
-
-        self.in_position = False
-        self.bars_in_trade = 0
-
-        self.trades: List[Dict] = []
-        self.trade_counter = 0
-        self.current_trade: Dict = {}
-
-        self.logger.warning(
-            f"[EXECUTOR READY] symbol={SYMBOL} | timeframe={ENTRY_TIMEFRAME}"
-        )
-        self.logger.warning(
-            "[ASSUMPTION] Executor assumes NO open position on startup."
-        )
-
-    # ==================================================
-    # Candle Fetching
-    # ==================================================
-
-    def _fetch_new_closed_candle(self) -> Dict | None:
-        """
-        Fetch latest candles and return a newly closed candle only once.
-
-        Ensures:
-        - No lookahead bias
-        - One decision per closed bar
-        """
-        candles = self.exchange.get_klines(
-            interval=ENTRY_TIMEFRAME,
-            limit=200,
-        )
-
-        if not candles:
-            return None
-
-        latest = candles[-1]
-
-        if latest["close_time"] == self.last_close_time:
-            return None
-
-        self.last_close_time = latest["close_time"]
-        self.entry_tf_candles = candles
-        return latest
-
-    # ==================================================
-    # Main Execution Loop
-    # ==================================================
-
-    def run(self):
-        self.logger.info("Execution loop started")
-
-        try:
-            while True:
-                candle = self._fetch_new_closed_candle()
-
-                if candle is None:
-                    time.sleep(self.poll_interval)
-                    continue
-
-                self.logger.info(
-                    f"[CANDLE] close_time={candle['close_time']} close={candle['close']}"
-                )
-
-                opens = np.array([c["open"] for c in self.entry_tf_candles])
-                closes = np.array([c["close"] for c in self.entry_tf_candles])
-
-                # Strategy decision
-                decision = self.logic.on_bar(
-                    opens=opens,
-                    closes=closes,
-                    in_position=self.in_position,
-                )
-
-                self.logger.info(
-                    f"[DECISION] decision={decision} in_position={self.in_position}"
-                )
-
-                # ==================================================
-                # ENTRY
-                # ==================================================
-
-                if decision == "BUY" and not self.in_position:
-                    self.logger.info("[SIGNAL] BUY")
-
-                    execution = self.exchange.place_market_order(
-                        side="BUY",
-                        quantity=POSITION_SIZE,
-                    )
-
-                    self.in_position = True
-                    self.bars_in_trade = 0
-                    self.trade_counter += 1
-
-                    self.current_trade = {
-                        "trade_id": f"T{self.trade_counter:03d}",
-                        "symbol": SYMBOL,
-                        "direction": "LONG",
-                        "entry_time": candle["close_time"],
-                        "entry_price": execution["price"],
-                        "quantity": execution["executed_qty"],
-                    }
-
-                # ==================================================
-                # EXIT
-                # ==================================================
-
-                elif decision == "SELL" and self.in_position:
-                    self.logger.info("[SIGNAL] SELL")
-
-                    execution = self.exchange.place_market_order(
-                        side="SELL",
-                        quantity=POSITION_SIZE,
-                    )
-
-                    self.in_position = False
-
-                    self.current_trade.update({
-                        "exit_time": candle["close_time"],
-                        "exit_price": execution["price"],
-                        "bars_held": self.bars_in_trade,
-                        "environment": (
-                            "DRY_RUN"
-                            if DRY_RUN
-                            else BINANCE.get("ENV")
-                        ),
-                    })
-
-                    self.trades.append(self.current_trade)
-                    write_trades_to_csv(LIVE_TRADES_CSV, self.trades)
-
-                    self.current_trade = {}
-                    self.bars_in_trade = 0
-
-                # ==================================================
-                # Position tracking
-                # ==================================================
-
-                if self.in_position:
-                    self.bars_in_trade += 1
-
-                time.sleep(self.poll_interval)
-
-        except KeyboardInterrupt:
-            self.logger.warning("Execution interrupted by user (Ctrl+C)")
-            self.logger.warning(
-                "If a position is open, it remains open on the exchange."
-            )
-        except Exception as e:
-            self.logger.error(f"Fatal error in executor | {e}")
-            raise
-
-
-if __name__ == "__main__":
-    validate_config()
-    executor = LiveTradingExecutor()
-    executor.run()
+"""
+Live trading executor for Binance Spot.
+
+IMPORTANT:
+- This executor MAY place REAL trades depending on configuration.
+- Supports DRY_RUN, SPOT_TESTNET, and SPOT_MAINNET.
+- Assumes LONG-ONLY, one position at a time.
+- Assumes NO open position on startup.
+- If the process restarts, the system assumes a FLAT state.
+
+Responsibilities:
+- Fetch closed candles
+- Feed candles bar-by-bar into strategy logic
+- Execute BUY / SELL decisions
+- Persist completed trades to CSV
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.config import (
+    SYMBOL,
+    STRATEGY_PARAMS,
+    POSITION_SIZE,
+    LIVE_TRADES_CSV,
+    ENTRY_TIMEFRAME,
+    DRY_RUN,
+    BINANCE,
+)
+
+from src.strategy.multi_tf import MultiTFTrendPullbackLogic
+from src.exchange.binance_spot import BinanceSpotExchange, KlineStreamError
+from src.utils.data import (
+    INTERVAL_MS,
+    CandleBuffer,
+    Trade,
+    TradeRecord,
+    open_trades_csv,
+    to_timestamp_ms,
+    to_utc_datetime,
+    trade_to_record,
+)
+from src.utils.enums import Side
+from src.utils.logger import get_logger
+from src.validation.config_checks import validate_config
+
+
+# REST fallback: wait this long past the expected candle close
+# before polling, and never poll more often than the minimum.
+_CLOSE_SLACK_MS = 2_000
+_MIN_POLL_MS = 1_000
+
+# Stream gaps: REST attempts (and the wait between them) before a
+# streamed candle is deferred because earlier bars are still missing.
+_GAP_RETRIES = 3
+_GAP_RETRY_MS = 2_000
+
+
+class LiveTradingExecutor:
+    """
+    Live execution engine.
+
+    Contract:
+    - One decision per CLOSED candle
+    - Strategy emits intent only (Side.BUY, Side.SELL, Side.NONE)
+    - Executor owns all side effects (orders, state, persistence)
+    """
+
+    def __init__(self, poll_interval_seconds: int = 30):
+        self.logger = get_logger("EXECUTOR")
+
+        # ==================================================
+        # Execution mode logging
+        # ==================================================
+
+        if DRY_RUN:
+            self.logger.warning("[MODE] DRY_RUN enabled — no real orders will be sent")
+        else:
+            self.logger.warning(
+                "[MODE] LIVE execution enabled | env=%s",
+                BINANCE.get("ENV"),
+            )
+
+        # ==================================================
+        # Initialize exchange (fail-fast)
+        # ==================================================
+
+        self.exchange = BinanceSpotExchange()
+
+        # ==================================================
+        # Initialize strategy logic
+        # ==================================================
+
+        self.logic = MultiTFTrendPullbackLogic(
+            entry_ema=STRATEGY_PARAMS["entry_ema"],
+            rsi_period=STRATEGY_PARAMS["rsi_period"],
+            rsi_entry=STRATEGY_PARAMS["rsi_entry"],
+            confirm_ema_fast=STRATEGY_PARAMS["confirm_ema_fast"],
+            confirm_ema_slow=STRATEGY_PARAMS["confirm_ema_slow"],
+            exit_bars=STRATEGY_PARAMS["exit_bars"],
+            confirm_tf_multiple=3,  # 15m trend derived from 5m bars
+        )
+
+        # ==================================================
+        # Runtime configuration
+        # ==================================================
+
+        # Used by the REST fallback until the first candle is known
+        self.poll_interval = poll_interval_seconds
+        self._interval_ms = INTERVAL_MS[ENTRY_TIMEFRAME]
+
+        # ==================================================
+        # Candle state
+        # ==================================================
+
+        # Column-wise (SoA) candle history
+        self.candles = CandleBuffer(size=200)
+
+        # ==================================================
+        # Position & trade tracking
+        # ==================================================
+
+        self.in_position = False
+        self.bars_in_trade = 0
+
+        self.trades: List[TradeRecord] = []
+        self.trade_counter = 0
+        self.current_trade: Optional[Trade] = None
+
+        # Fixed for the lifetime of the process
+        self._environment = "DRY_RUN" if DRY_RUN else BINANCE.get("ENV")
+
+        # Indexed by `decision * 2 + in_position`
+        self._handlers = (
+            self._on_buy,    # BUY,  flat
+            self._on_noop,   # BUY,  in position
+            self._on_noop,   # SELL, flat
+            self._on_sell,   # SELL, in position
+            self._on_noop,   # NONE, flat
+            self._on_noop,   # NONE, in position
+        )
+
+        # Trades CSV stays open; one row is appended per closed trade.
+        # NON-FATAL: if it cannot be opened, trading runs without it.
+        try:
+            self._trades_fp, self._trades_writer = open_trades_csv(
+                LIVE_TRADES_CSV
+            )
+        except OSError as e:
+            self._trades_fp = self._trades_writer = None
+            self.logger.warning(
+                "[CSV] Cannot open %s, trades will not be persisted | %s",
+                LIVE_TRADES_CSV,
+                e,
+            )
+
+        self.logger.warning(
+            "[EXECUTOR READY] symbol=%s | timeframe=%s",
+            SYMBOL,
+            ENTRY_TIMEFRAME,
+        )
+        self.logger.warning(
+            "[ASSUMPTION] Executor assumes NO open position on startup."
+        )
+
+    # ==================================================
+    # Candle Fetching
+    # ==================================================
+
+    async def _warm_up(self) -> None:
+        """
+        Load closed candle history once at startup and seed the
+        strategy indicators with it.
+        """
+        await self.exchange.fetch_klines_into(
+            self.candles,
+            interval=ENTRY_TIMEFRAME,
+            limit=self.candles.size,
+        )
+
+        if len(self.candles):
+            self.logic.seed(self.get_closes())
+
+    async def _catch_up(self) -> bool:
+        """
+        Fetch every closed candle newer than the last seen one,
+        feed them to the strategy in order and act on the newest.
+
+        Ensures:
+        - No lookahead bias
+        - One decision per closed bar, on the newest bar only
+
+        Returns
+        -------
+        bool
+            True if a new candle was processed
+        """
+        if not await self._backfill():
+            return False
+
+        await self._process_candle(self.candles.latest())
+        return True
+
+    async def _backfill(self, before: Optional[int] = None) -> bool:
+        """
+        Fetch every closed candle newer than the last seen one over
+        REST and feed all but the newest to the strategy as missed bars.
+
+        Binance returns the OLDEST klines after `startTime`, so a gap
+        is paged through until caught up.
+
+        Parameters
+        ----------
+        before : int, optional
+            Close time (ms) of a candle already received from the
+            stream. A newest REST candle closing before it is stale
+            and is fed as missed too.
+
+        Returns
+        -------
+        bool
+            True if new candles were stored; the newest one is then
+            the buffer's latest candle and has NOT been fed yet
+        """
+        page = self.candles.size
+        missed = 0
+        newest_close = None  # newest close seen so far, not yet fed
+
+        while True:
+            last_close_time = self.candles.last_close_time
+
+            stored = await self.exchange.fetch_klines_into(
+                self.candles,
+                interval=ENTRY_TIMEFRAME,
+                limit=page,
+                start_time=(
+                    last_close_time + 1 if last_close_time is not None else None
+                ),
+            )
+
+            if not stored:
+                break
+
+            # A newer page exists, so the previous newest bar is stale
+            if newest_close is not None:
+                self._feed_missed([newest_close])
+                missed += 1
+
+            new_closes = self.get_closes()[-stored:]
+            if self.logic.seeded:
+                self._feed_missed(new_closes[:-1].tolist())
+                missed += stored - 1
+            else:
+                self.logic.seed(new_closes[:-1])
+
+            newest_close = new_closes[-1]
+
+            if last_close_time is None or stored < page:
+                break
+
+        if (
+            newest_close is not None
+            and before is not None
+            and self.candles.last_close_time < before
+        ):
+            self._feed_missed([newest_close])
+            missed += 1
+            newest_close = None
+
+        if missed:
+            self.logger.warning(
+                "[GAP] Backfilled %d missed candle(s); they update state only",
+                missed,
+            )
+
+        return newest_close is not None
+
+    def _feed_missed(self, closes) -> None:
+        """
+        Advance strategy and position state through closed bars
+        that are too old to act on.
+        """
+        for close in closes:
+            self.logic.on_missed_bar(close, self.in_position)
+
+            if self.in_position:
+                self.bars_in_trade += 1
+
+    def get_opens(self) -> np.ndarray:
+        """
+        Historical open prices (oldest first, including latest bar).
+        """
+        return self.candles.opens
+
+    def get_closes(self) -> np.ndarray:
+        """
+        Historical close prices (oldest first, including latest bar).
+        """
+        return self.candles.closes
+
+    # ==================================================
+    # Bar Processing
+    # ==================================================
+
+    async def _process_candle(self, candle: Dict) -> None:
+        """
+        Run strategy and execution for one newly closed candle.
+        """
+        # Per-bar logs are skipped entirely above INFO
+        log_bar = self.logger.isEnabledFor(logging.INFO)
+
+        if log_bar:
+            self.logger.info(
+                "[CANDLE] close_time=%s close=%s",
+                candle["close_time"],
+                candle["close"],
+            )
+
+        # First bar: feed the warm-up history into the indicators once
+        if not self.logic.seeded:
+            self.logic.seed(self.get_closes()[:-1])
+
+        # Strategy decision (scalar hot path, read from the buffer)
+        decision = self.logic.on_bar_tick(
+            open_px=self.get_opens()[-1],
+            close_px=self.get_closes()[-1],
+            in_position=self.in_position,
+        )
+
+        if log_bar:
+            self.logger.info(
+                "[DECISION] decision=%s in_position=%s",
+                Side(decision).name,
+                self.in_position,
+            )
+
+        # Dispatch on (decision, in_position)
+        await self._handlers[decision * 2 + self.in_position](candle)
+
+        # ==================================================
+        # Position tracking
+        # ==================================================
+
+        if self.in_position:
+            self.bars_in_trade += 1
+
+    # ==================================================
+    # ENTRY
+    # ==================================================
+
+    async def _on_buy(self, candle: Dict) -> None:
+        self.logger.info("[SIGNAL] BUY")
+
+        execution = await self.exchange.place_market_order(
+            side=Side.BUY,
+            quantity=POSITION_SIZE,
+        )
+
+        self.in_position = True
+        self.bars_in_trade = 0
+        self.trade_counter += 1
+
+        self.current_trade = Trade(
+            trade_id=f"T{self.trade_counter:03d}",
+            symbol=SYMBOL,
+            direction="LONG",
+            entry_time=candle["close_time"],
+            entry_price=execution["price"],
+            quantity=execution["executed_qty"],
+        )
+
+    # ==================================================
+    # EXIT
+    # ==================================================
+
+    async def _on_sell(self, candle: Dict) -> None:
+        self.logger.info("[SIGNAL] SELL")
+
+        execution = await self.exchange.place_market_order(
+            side=Side.SELL,
+            quantity=POSITION_SIZE,
+        )
+
+        self.in_position = False
+
+        trade = self.current_trade
+        trade.exit_time = candle["close_time"]
+        trade.exit_price = execution["price"]
+        trade.bars_held = self.bars_in_trade
+        trade.environment = self._environment
+
+        record = trade_to_record(trade)
+        self.trades.append(record)
+
+        # File I/O runs off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._persist_trade, record
+        )
+
+        self.current_trade = None
+        self.bars_in_trade = 0
+
+    async def _on_noop(self, candle: Dict) -> None:
+        pass
+
+    def _persist_trade(self, record: TradeRecord) -> None:
+        """
+        Append one completed trade to the open trades CSV.
+
+        NON-FATAL: CSV write failures must never crash live trading.
+        """
+        if self._trades_writer is None:
+            return
+
+        try:
+            self._trades_writer.writerow(record)
+            self._trades_fp.flush()
+        except Exception as e:
+            self.logger.warning("Failed to write trade to CSV | %s", e)
+
+    async def _on_kline(self, candle: Dict | None) -> None:
+        """
+        Handle one closed entry-timeframe candle from the stream.
+
+        `candle` is None when the stream reports an error; missed
+        bars are then recovered over REST.
+        """
+        if candle is None:
+            await self._catch_up()
+            return
+
+        last_close_time = self.candles.last_close_time
+        close_time = to_timestamp_ms(candle["close_time"])
+
+        if last_close_time is not None and close_time <= last_close_time:
+            return
+
+        # Bars missed during a reconnect or between warm-up and
+        # subscribing are backfilled over REST before this one
+        if (
+            last_close_time is not None
+            and close_time - last_close_time > self._interval_ms
+        ):
+            self.logger.warning(
+                "[GAP] Stream skipped %d candle(s); backfilling over REST",
+                (close_time - last_close_time) // self._interval_ms - 1,
+            )
+
+            if not await self._backfill_before(close_time):
+                return
+
+            # REST served this candle too and it was processed there
+            if self.candles.last_close_time >= close_time:
+                return
+
+        if self.candles.append_candle(candle):
+            await self._process_candle(candle)
+
+    async def _backfill_before(self, close_time: int) -> bool:
+        """
+        Backfill over REST up to the candle preceding a streamed one.
+
+        REST can lag the stream by a few seconds, so the fetch is
+        retried until it reaches `close_time - interval`. If REST
+        serves the streamed candle itself, it is processed here.
+
+        Returns
+        -------
+        bool
+            True if every bar before `close_time` is now stored, so the
+            streamed candle can be appended; False if bars are still
+            missing (the streamed candle is then left to the next gap)
+        """
+        target = close_time - self._interval_ms
+
+        for attempt in range(_GAP_RETRIES):
+            if attempt:
+                await asyncio.sleep(_GAP_RETRY_MS / 1000)
+
+            if await self._backfill(before=close_time):
+                await self._process_candle(self.candles.latest())
+                return True
+
+            if self.candles.last_close_time >= target:
+                return True
+
+        self.logger.warning(
+            "[GAP] REST still missing %d candle(s) before %s; "
+            "skipping it until the next candle triggers a backfill",
+            (target - self.candles.last_close_time) // self._interval_ms,
+            to_utc_datetime(close_time),
+        )
+        return False
+
+    # ==================================================
+    # Main Execution Loop
+    # ==================================================
+
+    async def _stream(self):
+        """
+        WebSocket loop: one decision per pushed closed candle.
+        """
+        async for candle in self.exchange.stream_closed_klines(ENTRY_TIMEFRAME):
+            await self._on_kline(candle)
+
+    async def _poll(self):
+        """
+        REST polling loop, used when the WebSocket stream is unavailable.
+        """
+        while True:
+            await self._catch_up()
+
+            await asyncio.sleep(self._seconds_until_next_close())
+
+    def _seconds_until_next_close(self) -> float:
+        """
+        Time until the next candle should have closed and been
+        published, so the fallback poll wakes right after it.
+        """
+        last_close_time = self.candles.last_close_time
+
+        if last_close_time is None:
+            return self.poll_interval
+
+        wait_ms = (
+            last_close_time
+            + self._interval_ms
+            + _CLOSE_SLACK_MS
+            - int(time.time() * 1000)
+        )
+        return max(wait_ms, _MIN_POLL_MS) / 1000
+
+    async def run(self):
+        self.logger.info("Execution loop started")
+
+        try:
+            await self.exchange.connect()
+            await self._warm_up()
+
+            try:
+                await self._stream()
+            except KlineStreamError as e:
+                self.logger.warning(
+                    "[STREAM] WebSocket unavailable, using REST polling | %s",
+                    e,
+                )
+                await self._poll()
+
+        except asyncio.CancelledError:
+            self.logger.warning("Execution interrupted by user (Ctrl+C)")
+            self.logger.warning(
+                "If a position is open, it remains open on the exchange."
+            )
+            raise
+        except Exception as e:
+            self.logger.error("Fatal error in executor | %s", e)
+            raise
+        finally:
+            await self.exchange.close()
+            if self._trades_fp is not None:
+                self._trades_fp.close()
+
+
+if __name__ == "__main__":
+    validate_config()
+    executor = LiveTradingExecutor()
+    try:
+        asyncio.run(executor.run())
+    except KeyboardInterrupt:
+        pass
@@ -1,186 +1,615 @@
-import numpy as np
-
-
-class MultiTFTrendPullbackLogic:
-    """
-    Pure strategy logic component.
-
-    Characteristics:
-    - Framework agnostic
-    - No execution, no I/O
-    - Operates strictly bar-by-bar
-    - Maintains internal state across bars
-
-    Contract:
-    - Called exactly once per CLOSED base-timeframe candle
-    - Consumes arrays of historical opens/closes (including latest bar)
-    - Emits INTENT only (no orders)
-
-    Returned signals:
-    - "BUY"  -> request to open a long position
-    - "SELL" -> request to exit an existing position
-    - None   -> no action
-    """
-
-    def __init__(
-        self,
-        entry_ema: int,
-        rsi_period: int,
-        rsi_entry: float,
-        confirm_ema_fast: int,
-        confirm_ema_slow: int,
-        exit_bars: int,
-        confirm_tf_multiple: int,
-    ):
-        # ----------------------------
-        # Strategy parameters
-        # ----------------------------
-        self.entry_ema = entry_ema
-        self.rsi_period = rsi_period
-        self.rsi_entry = rsi_entry
-        self.confirm_ema_fast = confirm_ema_fast
-        self.confirm_ema_slow = confirm_ema_slow
-        self.exit_bars = exit_bars
-        self.confirm_tf_multiple = confirm_tf_multiple
-
-        # ----------------------------
-        # Internal state
-        # ----------------------------
-        self.bar_index = 0
-        self.bars_in_trade = 0
-
-        # Higher-timeframe trend state
-        self.htf_trend_bullish = None
-        self.htf_closes = []
-
-    # ==================================================
-    # Indicator helpers
-    # ==================================================
-
-    @staticmethod
-    def ema(values, period):
-        """
-        Compute EMA over given values.
-        """
-        if len(values) < period:
-            return None
-
-        alpha = 2 / (period + 1)
-        ema_val = values[0]
-        for v in values[1:]:
-            ema_val = alpha * v + (1 - alpha) * ema_val
-        return ema_val
-
-    @staticmethod
-    def rsi(values, period):
-        """
-        Compute RSI over given values.
-        """
-        if len(values) < period + 1:
-            return None
-
-        deltas = np.diff(values)
-        gains = np.where(deltas > 0, deltas, 0.0)
-        losses = np.where(deltas < 0, -deltas, 0.0)
-
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-
-        if avg_loss == 0:
-            return 100.0
-
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
-
-    # ==================================================
-    # Higher timeframe logic
-    # ==================================================
-
-    def _update_confirm_trend(self, closes):
-        """
-        Update higher timeframe trend using aggregated closes.
-
-        Assumes this method is called every `confirm_tf_multiple`
-        base-timeframe bars.
-        """
-        self.htf_closes.append(closes[-1])
-
-        if len(self.htf_closes) < self.confirm_ema_slow:
-            self.htf_trend_bullish = None
-            return
-
-        fast = self.ema(
-            self.htf_closes[-self.confirm_ema_fast:],
-            self.confirm_ema_fast,
-        )
-        slow = self.ema(
-            self.htf_closes[-self.confirm_ema_slow:],
-            self.confirm_ema_slow,
-        )
-
-        self.htf_trend_bullish = fast > slow
-
-    # ==================================================
-    # Core logic
-    # ==================================================
-
-    def on_bar(self, opens, closes, in_position) -> str | None:
-        """
-        Process one CLOSED base-timeframe candle.
-
-        Parameters
-        ----------
-        opens : array-like
-            Historical open prices (including latest closed bar)
-        closes : array-like
-            Historical close prices (including latest closed bar)
-        in_position : bool
-            Whether the executor currently holds a position
-
-        Returns
-        -------
-        str or None
-            "BUY", "SELL", or None
-        """
-
-        self.bar_index += 1
-
-        # Update higher timeframe trend periodically
-        if self.bar_index % self.confirm_tf_multiple == 0:
-            self._update_confirm_trend(closes)
-
-        # ----------------------------
-        # Exit logic (time-based)
-        # ----------------------------
-        if in_position:
-            self.bars_in_trade += 1
-
-            if self.bars_in_trade >= self.exit_bars:
-                self.bars_in_trade = 0
-                return "SELL"
-
-            return None
-
-        # ----------------------------
-        # Entry logic
-        # ----------------------------
-        if self.htf_trend_bullish is False:
-            return None
-
-        if len(closes) < max(self.entry_ema, self.rsi_period) + 1:
-            return None
-
-        entry_ema = self.ema(closes[-self.entry_ema:], self.entry_ema)
-        rsi_val = self.rsi(
-            closes[-(self.rsi_period + 1):],
-            self.rsi_period,
-        )
-
-        pullback = closes[-1] <= entry_ema
-        rsi_ok = rsi_val >= self.rsi_entry
-        bullish_candle = closes[-1] > opens[-1]
-
-        if pullback and rsi_ok and bullish_candle:
-            return "BUY"
-
-        return None
+from collections import deque
+
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # optional: C-level EMA filter for batch series
+    lfilter = None
+
+from src.utils._njit import njit
+from src.utils.enums import SIG_BUY, SIG_NONE, SIG_SELL
+
+
+# ==================================================
+# Numeric kernels (JIT-compiled when numba is installed)
+# ==================================================
+
+@njit(cache=True)
+def _ema_loop(values, period):
+    """
+    SMA-seeded EMA of a float64 array. Requires len(values) >= period.
+    """
+    alpha = 2.0 / (period + 1)
+
+    ema_val = 0.0
+    for i in range(period):
+        ema_val += values[i]
+    ema_val /= period
+
+    for i in range(period, len(values)):
+        ema_val = alpha * values[i] + (1.0 - alpha) * ema_val
+    return ema_val
+
+
+@njit(cache=True)
+def _rsi_loop(values, period):
+    """
+    Wilder average gain and loss of a float64 array.
+    Requires len(values) >= period + 1.
+
+    Single pass: deltas are summed for the SMA seed and smoothed
+    afterwards in the same loop, with no temporary arrays.
+    """
+    avg_gain = 0.0
+    avg_loss = 0.0
+    decay = period - 1
+
+    for i in range(1, len(values)):
+        delta = values[i] - values[i - 1]
+        if delta > 0:
+            gain = delta
+            loss = 0.0
+        else:
+            gain = 0.0
+            loss = -delta
+
+        if i > period:
+            avg_gain = (avg_gain * decay + gain) / period
+            avg_loss = (avg_loss * decay + loss) / period
+        else:
+            avg_gain += gain
+            avg_loss += loss
+            if i == period:
+                avg_gain /= period
+                avg_loss /= period
+
+    return avg_gain, avg_loss
+
+
+@njit(cache=True)
+def _ema_series_loop(values, period):
+    """
+    SMA-seeded EMA at every index of a float64 array (NaN until seeded).
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    alpha = 2.0 / (period + 1)
+    beta = 1.0 - alpha
+
+    ema_val = 0.0
+    for i in range(period):
+        ema_val += values[i]
+    ema_val /= period
+    out[period - 1] = ema_val
+
+    for i in range(period, n):
+        ema_val = alpha * values[i] + beta * ema_val
+        out[i] = ema_val
+    return out
+
+
+@njit(cache=True)
+def _rsi_series_loop(values, period):
+    """
+    Wilder RSI at every index of a float64 array (NaN until seeded).
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    decay = period - 1
+
+    for i in range(1, n):
+        delta = values[i] - values[i - 1]
+        if delta > 0:
+            gain = delta
+            loss = 0.0
+        else:
+            gain = 0.0
+            loss = -delta
+
+        if i > period:
+            avg_gain = (avg_gain * decay + gain) / period
+            avg_loss = (avg_loss * decay + loss) / period
+        else:
+            avg_gain += gain
+            avg_loss += loss
+            if i < period:
+                continue
+            avg_gain /= period
+            avg_loss /= period
+
+        if avg_loss == 0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    return out
+
+
+def _ema_series(values, period):
+    """
+    SMA-seeded EMA series. Uses scipy's lfilter (one C-level IIR pass)
+    when available, the JIT loop otherwise.
+    """
+    if lfilter is None or len(values) < period:
+        return _ema_series_loop(values, period)
+
+    alpha = 2.0 / (period + 1)
+    beta = 1.0 - alpha
+    seed = values[:period].mean()
+
+    out = np.full(len(values), np.nan)
+    out[period - 1] = seed
+    out[period:] = lfilter(
+        [alpha], [1.0, -beta], values[period:], zi=[beta * seed]
+    )[0]
+    return out
+
+
+class MultiTFTrendPullbackLogic:
+    """
+    Pure strategy logic component.
+
+    Characteristics:
+    - Framework agnostic
+    - No execution, no I/O
+    - Operates strictly bar-by-bar
+    - Maintains internal state across bars
+
+    Contract:
+    - Called exactly once per CLOSED base-timeframe candle
+    - on_bar_tick consumes the latest bar's open/close as scalars;
+      on_bar wraps it for float64 ndarrays of historical prices
+    - Indicators are updated incrementally: history is read once
+      (seed / first on_bar call), afterwards only the latest bar
+    - Emits INTENT only (no orders)
+
+    Returned signals (plain ints, same values as Side):
+    - SIG_BUY  -> request to open a long position
+    - SIG_SELL -> request to exit an existing position
+    - SIG_NONE -> no action
+    """
+
+    def __init__(
+        self,
+        entry_ema: int,
+        rsi_period: int,
+        rsi_entry: float,
+        confirm_ema_fast: int,
+        confirm_ema_slow: int,
+        exit_bars: int,
+        confirm_tf_multiple: int,
+    ):
+        # ----------------------------
+        # Strategy parameters
+        # ----------------------------
+        self.entry_ema = entry_ema
+        self.rsi_period = rsi_period
+        self.rsi_entry = rsi_entry
+        self.confirm_ema_fast = confirm_ema_fast
+        self.confirm_ema_slow = confirm_ema_slow
+        self.exit_bars = exit_bars
+        self.confirm_tf_multiple = confirm_tf_multiple
+
+        # ----------------------------
+        # Precomputed per-bar constants
+        # ----------------------------
+        self._entry_alpha = 2 / (entry_ema + 1)
+        self._entry_beta = 1 - self._entry_alpha
+        self._htf_fast_alpha = 2 / (confirm_ema_fast + 1)
+        self._htf_fast_beta = 1 - self._htf_fast_alpha
+        self._htf_slow_alpha = 2 / (confirm_ema_slow + 1)
+        self._htf_slow_beta = 1 - self._htf_slow_alpha
+        self._rsi_decay = rsi_period - 1
+        self._min_history = max(entry_ema, rsi_period) + 1
+
+        # ----------------------------
+        # Internal state
+        # ----------------------------
+        self.bar_index = 0
+        self.bars_in_trade = 0
+
+        # Higher-timeframe trend state
+        self.htf_trend_bullish = None
+        # Only needed to seed the HTF EMAs, released afterwards
+        self.htf_closes = deque(maxlen=confirm_ema_slow)
+        self._htf_fast_state = None
+        self._htf_slow_state = None
+        self._htf_seen = 0
+
+        # Incremental entry indicator state (one update per close)
+        self._entry_ema_state = None
+        self._entry_ema_sum = 0.0
+        self._rsi_seeded = False
+        self._rsi_deltas = np.empty(rsi_period)
+        self._rsi_avg_gain = None
+        self._rsi_avg_loss = None
+        self._prev_close = None
+        self._closes_seen = 0
+
+    # ==================================================
+    # Indicator helpers
+    # ==================================================
+
+    @staticmethod
+    def ema(values, period):
+        """
+        Compute EMA over given values, seeded with the SMA of the
+        first `period` values.
+        """
+        if len(values) < period:
+            return None
+
+        return _ema_loop(np.asarray(values, dtype=np.float64), period)
+
+    @staticmethod
+    def rsi(values, period):
+        """
+        Compute Wilder RSI over given values, seeded with the mean
+        gain/loss of the first `period` deltas.
+        """
+        if len(values) < period + 1:
+            return None
+
+        avg_gain, avg_loss = _rsi_loop(
+            np.asarray(values, dtype=np.float64), period
+        )
+        if avg_loss == 0:
+            return 100.0
+
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def on_close(self, price):
+        """
+        Update entry EMA and RSI state with one new close.
+        """
+        prev_seen = self._closes_seen
+        seen = prev_seen + 1
+        period = self.entry_ema
+
+        # SMA seed over the first `entry_ema` closes, recurrence afterwards
+        if seen > period:
+            self._entry_ema_state = (
+                self._entry_alpha * price
+                + self._entry_beta * self._entry_ema_state
+            )
+        elif seen == period:
+            self._entry_ema_state = (self._entry_ema_sum + price) / period
+        else:
+            self._entry_ema_sum += price
+
+        prev_close = self._prev_close
+        if prev_close is not None:
+            delta = price - prev_close
+
+            if self._rsi_seeded:
+                # Wilder's smoothing: scalar update only
+                n = self.rsi_period
+                decay = self._rsi_decay
+                gain = max(delta, 0.0)
+                loss = max(-delta, 0.0)
+                self._rsi_avg_gain = (self._rsi_avg_gain * decay + gain) / n
+                self._rsi_avg_loss = (self._rsi_avg_loss * decay + loss) / n
+            else:
+                # Buffer the first `rsi_period` deltas, seed once from
+                # their mean, then release the buffer
+                deltas = self._rsi_deltas
+                deltas[prev_seen - 1] = delta
+                if prev_seen == self.rsi_period:
+                    self._rsi_avg_gain = float(
+                        np.where(deltas > 0, deltas, 0.0).mean()
+                    )
+                    self._rsi_avg_loss = float(
+                        np.where(deltas < 0, -deltas, 0.0).mean()
+                    )
+                    self._rsi_seeded = True
+                    self._rsi_deltas = None
+
+        self._prev_close = price
+        self._closes_seen = seen
+
+    def _current_rsi(self):
+        """
+        RSI from the current smoothed gain/loss state.
+        """
+        if not self._rsi_seeded:
+            return None
+
+        if self._rsi_avg_loss == 0:
+            return 100.0
+
+        rs = self._rsi_avg_gain / self._rsi_avg_loss
+        return 100 - (100 / (1 + rs))
+
+    # ==================================================
+    # Higher timeframe logic
+    # ==================================================
+
+    def _update_confirm_trend(self, price):
+        """
+        Update higher timeframe trend with the latest base close.
+
+        Assumes this method is called every `confirm_tf_multiple`
+        base-timeframe bars.
+        """
+        self._htf_seen += 1
+        seen = self._htf_seen
+
+        if self.htf_closes is not None:
+            self.htf_closes.append(price)
+
+        # Each EMA is seeded with the SMA of its first `period` HTF
+        # closes and updated in O(1) afterwards
+        fast_n = self.confirm_ema_fast
+        if seen == fast_n:
+            self._htf_fast_state = sum(self.htf_closes) / fast_n
+        elif seen > fast_n:
+            self._htf_fast_state = (
+                self._htf_fast_alpha * price
+                + self._htf_fast_beta * self._htf_fast_state
+            )
+
+        slow_n = self.confirm_ema_slow
+        if seen == slow_n:
+            self._htf_slow_state = sum(self.htf_closes) / slow_n
+            self.htf_closes = None
+        elif seen > slow_n:
+            self._htf_slow_state = (
+                self._htf_slow_alpha * price
+                + self._htf_slow_beta * self._htf_slow_state
+            )
+
+        if seen < slow_n:
+            self.htf_trend_bullish = None
+            return
+
+        self.htf_trend_bullish = self._htf_fast_state > self._htf_slow_state
+
+    # ==================================================
+    # Core logic
+    # ==================================================
+
+    @staticmethod
+    def _check_price_array(name, values):
+        """
+        Enforce the float64, C-contiguous ndarray contract of on_bar.
+        """
+        if not isinstance(values, np.ndarray):
+            raise TypeError(f"{name} must be a numpy.ndarray")
+
+        if values.dtype != np.float64 or not values.flags.c_contiguous:
+            raise TypeError(f"{name} must be a C-contiguous float64 array")
+
+    @property
+    def seeded(self) -> bool:
+        """
+        True once any close has been fed into the indicator state.
+        """
+        return self._closes_seen > 0
+
+    def seed(self, closes: np.ndarray) -> None:
+        """
+        Feed historical closes into the indicator state.
+
+        Emits no signals and does not advance `bar_index`. Call once,
+        before the first on_bar_tick, with the history preceding it.
+        A full warm-up history is reduced by the array kernels in one
+        call; shorter or follow-up histories go through on_close.
+
+        Parameters
+        ----------
+        closes : np.ndarray
+            Historical close prices (oldest first), float64
+            and C-contiguous
+        """
+        self._check_price_array("closes", closes)
+
+        n = len(closes)
+        if self._closes_seen or n < self._min_history:
+            for c in closes.tolist():
+                self.on_close(c)
+            return
+
+        avg_gain, avg_loss = _rsi_loop(closes, self.rsi_period)
+        self._entry_ema_state = float(_ema_loop(closes, self.entry_ema))
+        self._rsi_avg_gain = float(avg_gain)
+        self._rsi_avg_loss = float(avg_loss)
+        self._rsi_seeded = True
+        self._rsi_deltas = None
+        self._prev_close = float(closes[-1])
+        self._closes_seen = n
+
+    def on_bar(
+        self,
+        opens: np.ndarray,
+        closes: np.ndarray,
+        in_position: bool,
+    ) -> int:
+        """
+        Process one CLOSED base-timeframe candle from price arrays.
+
+        Array wrapper around on_bar_tick: the history is seeded on the
+        first call, afterwards only the latest bar is read.
+
+        Parameters
+        ----------
+        opens : np.ndarray
+            Historical open prices (including latest closed bar),
+            float64 and C-contiguous. Views are never copied.
+        closes : np.ndarray
+            Historical close prices (including latest closed bar),
+            float64 and C-contiguous. Views are never copied.
+        in_position : bool
+            Whether the executor currently holds a position
+
+        Returns
+        -------
+        int
+            SIG_BUY, SIG_SELL, or SIG_NONE
+        """
+        if not self.seeded:
+            self._check_price_array("opens", opens)
+            self.seed(closes[:-1])
+
+        return self.on_bar_tick(opens[-1], closes[-1], in_position)
+
+    def _advance(self, close_px):
+        """
+        Advance bar count, entry indicators and HTF trend by one close.
+        """
+        self.bar_index += 1
+
+        self.on_close(close_px)
+
+        # Update higher timeframe trend periodically
+        if self.bar_index % self.confirm_tf_multiple == 0:
+            self._update_confirm_trend(close_px)
+
+    def on_missed_bar(self, close_px: float, in_position: bool) -> None:
+        """
+        Advance state for a CLOSED bar that is too old to act on.
+
+        Used when the executor catches up after a data gap: every
+        missed close still updates the indicators (which depend on
+        bar order) and the time-based exit counter, but no signal
+        is emitted. The exit, if due, fires on the next on_bar_tick.
+
+        Parameters
+        ----------
+        close_px : float
+            Close price of the missed bar
+        in_position : bool
+            Whether the executor currently holds a position
+        """
+        self._advance(close_px)
+
+        if in_position:
+            self.bars_in_trade += 1
+
+    def on_bar_tick(
+        self,
+        open_px: float,
+        close_px: float,
+        in_position: bool,
+    ) -> int:
+        """
+        Process one CLOSED base-timeframe candle from scalar prices.
+
+        Hot path: scalar state updates and comparisons only, no array
+        access. History, if any, must be passed to `seed` first.
+
+        Parameters
+        ----------
+        open_px : float
+            Open price of the latest closed bar
+        close_px : float
+            Close price of the latest closed bar
+        in_position : bool
+            Whether the executor currently holds a position
+
+        Returns
+        -------
+        int
+            SIG_BUY, SIG_SELL, or SIG_NONE
+        """
+
+        self._advance(close_px)
+
+        # ----------------------------
+        # Exit logic (time-based)
+        # ----------------------------
+        if in_position:
+            self.bars_in_trade += 1
+
+            if self.bars_in_trade >= self.exit_bars:
+                self.bars_in_trade = 0
+                return SIG_SELL
+
+            return SIG_NONE
+
+        # ----------------------------
+        # Entry logic
+        # ----------------------------
+        if self.htf_trend_bullish is False:
+            return SIG_NONE
+
+        if self._closes_seen < self._min_history:
+            return SIG_NONE
+
+        # Cheapest checks first; indicator state is already up to date,
+        # so skipping the later checks never affects future bars
+
+        # Bullish candle
+        if close_px <= open_px:
+            return SIG_NONE
+
+        # Pullback to the entry EMA
+        if close_px > self._entry_ema_state:
+            return SIG_NONE
+
+        # RSI filter
+        if self._current_rsi() < self.rsi_entry:
+            return SIG_NONE
+
+        return SIG_BUY
+
+    # ==================================================
+    # Batch (backtest) helpers
+    # ==================================================
+
+    def precompute(self, opens: np.ndarray, closes: np.ndarray):
+        """
+        Compute every indicator series for a full history in one pass.
+
+        Values match the incremental state this instance would hold
+        had on_bar been called once per bar from the first element,
+        so a backtest loop can read `series[i]` instead of driving
+        the indicators bar by bar. Does not modify instance state.
+
+        Parameters
+        ----------
+        opens : np.ndarray
+            Open prices, float64 and C-contiguous
+        closes : np.ndarray
+            Close prices, float64 and C-contiguous
+
+        Returns
+        -------
+        dict
+            `entry_ema`, `rsi`, `htf_fast`, `htf_slow` (NaN until
+            seeded, HTF values held between HTF bars) and `bullish`
+            (close > open), each aligned with `closes`
+        """
+        self._check_price_array("opens", opens)
+        self._check_price_array("closes", closes)
+
+        n = len(closes)
+        m = self.confirm_tf_multiple
+
+        # HTF closes are the base closes on which on_bar updates the trend
+        htf_closes = np.ascontiguousarray(closes[m - 1::m])
+        htf_fast = _ema_series(htf_closes, self.confirm_ema_fast)
+        htf_slow = _ema_series(htf_closes, self.confirm_ema_slow)
+
+        # Index of the latest completed HTF bar for every base bar
+        htf_idx = np.arange(1, n + 1) // m - 1
+        has_htf = htf_idx >= 0
+
+        htf_fast_series = np.full(n, np.nan)
+        htf_slow_series = np.full(n, np.nan)
+        htf_fast_series[has_htf] = htf_fast[htf_idx[has_htf]]
+        htf_slow_series[has_htf] = htf_slow[htf_idx[has_htf]]
+
+        return {
+            "entry_ema": _ema_series(closes, self.entry_ema),
+            "rsi": _rsi_series_loop(closes, self.rsi_period),
+            "htf_fast": htf_fast_series,
+            "htf_slow": htf_slow_series,
+            "bullish": closes > opens,
+        }
@@ -0,0 +1,13 @@
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        """
+        No-op stand-in for numba.njit when numba is not installed.
+
+        Supports both the bare `@njit` and the `@njit(...)` forms.
+        """
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
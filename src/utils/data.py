@@ -1,92 +1,368 @@
-import csv
-import os
-from datetime import datetime, timezone
-from typing import Dict, List
-
-
-# ==============================
-# Candle Utilities
-# ==============================
-
-def to_utc_datetime(timestamp_ms: int) -> datetime:
-    """
-    Convert millisecond timestamp to UTC datetime.
-    """
-    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-
-
-def normalize_kline(kline: List) -> Dict:
-    """
-    Normalize a Binance kline (candlestick) into a standard dict.
-    """
-    return {
-        "open_time": to_utc_datetime(kline[0]),
-        "close_time": to_utc_datetime(kline[6]),
-        "open": float(kline[1]),
-        "high": float(kline[2]),
-        "low": float(kline[3]),
-        "close": float(kline[4]),
-        "volume": float(kline[5]),
-    }
-
-
-# ==============================
-# CSV Utilities
-# ==============================
-
-CSV_FIELDS = [
-    "trade_id",
-    "symbol",
-    "direction",
-    "entry_time",
-    "entry_price",
-    "exit_time",
-    "exit_price",
-    "bars_held",
-    "environment",
-]
-
-
-def write_trades_to_csv(file_path: str, trades: List[Dict]) -> None:
-    """
-    Append completed trades to a CSV file.
-
-    This function is NON-FATAL:
-    - CSV write failures must never crash live trading.
-    """
-    if not trades:
-        return
-
-    file_exists = os.path.exists(file_path)
-
-    try:
-        with open(file_path, mode="a", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
-
-            if not file_exists:
-                writer.writeheader()
-
-            # Write only the most recent trade
-            trade = trades[-1]
-
-            writer.writerow({
-                "trade_id": trade.get("trade_id"),
-                "symbol": trade.get("symbol"),
-                "direction": trade.get("direction"),
-                "entry_time": (
-                    trade["entry_time"].isoformat()
-                    if trade.get("entry_time") else None
-                ),
-                "entry_price": trade.get("entry_price"),
-                "exit_time": (
-                    trade["exit_time"].isoformat()
-                    if trade.get("exit_time") else None
-                ),
-                "exit_price": trade.get("exit_price"),
-                "bars_held": trade.get("bars_held"),
-                "environment": trade.get("environment"),
-            })
-
-    except Exception as e:
-        # Intentionally swallow exceptions to avoid crashing live trading
-        print(f"[WARN] Failed to write trades to CSV: {e}")
+import csv
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+
+# ==============================
+# Candle Utilities
+# ==============================
+
+# Binance Spot kline interval lengths in milliseconds
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+}
+
+
+def to_utc_datetime(timestamp_ms: int) -> datetime:
+    """
+    Convert millisecond timestamp to UTC datetime.
+    """
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+
+
+def normalize_stream_kline(kline: Dict) -> Dict:
+    """
+    Normalize a Binance WebSocket kline payload (the "k" object)
+    into a standard candle dict.
+    """
+    return {
+        "open_time": to_utc_datetime(kline["t"]),
+        "close_time": to_utc_datetime(kline["T"]),
+        "open": float(kline["o"]),
+        "high": float(kline["h"]),
+        "low": float(kline["l"]),
+        "close": float(kline["c"]),
+        "volume": float(kline["v"]),
+    }
+
+
+# Structured row layout for batches of klines (times as int64 ms)
+KLINE_DTYPE = np.dtype([
+    ("open_time", np.int64),
+    ("close_time", np.int64),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+])
+
+
+def normalize_klines(klines: List) -> np.ndarray:
+    """
+    Normalize a batch of raw Binance klines into one structured array.
+
+    Parses each column in a single vectorized pass instead of
+    building a dict per kline. Times stay as int64 milliseconds;
+    convert with `to_utc_datetime` only when needed for display.
+
+    Parameters
+    ----------
+    klines : list
+        Raw klines as returned by the REST API
+
+    Returns
+    -------
+    np.ndarray
+        Array of KLINE_DTYPE rows, in input order
+    """
+    out = np.empty(len(klines), dtype=KLINE_DTYPE)
+    if not klines:
+        return out
+
+    raw = np.asarray(klines, dtype=object)
+    out["open_time"] = raw[:, 0].astype(np.int64)
+    out["close_time"] = raw[:, 6].astype(np.int64)
+    out["open"] = raw[:, 1].astype(np.float64)
+    out["high"] = raw[:, 2].astype(np.float64)
+    out["low"] = raw[:, 3].astype(np.float64)
+    out["close"] = raw[:, 4].astype(np.float64)
+    out["volume"] = raw[:, 5].astype(np.float64)
+    return out
+
+
+def to_timestamp_ms(dt: datetime) -> int:
+    """
+    Convert UTC datetime to millisecond timestamp.
+    """
+    return round(dt.timestamp() * 1000)
+
+
+class CandleBuffer:
+    """
+    Fixed-size ring buffer of candles stored column-wise.
+
+    Each field is a contiguous numpy array (times as int64 ms,
+    prices and volume as float64). Every value is written twice,
+    at `i` and `i + size`, so the latest `size` candles are always
+    available as a contiguous zero-copy view.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+
+        self._open_time = np.empty(2 * size, dtype=np.int64)
+        self._close_time = np.empty(2 * size, dtype=np.int64)
+        self._open = np.empty(2 * size, dtype=np.float64)
+        self._high = np.empty(2 * size, dtype=np.float64)
+        self._low = np.empty(2 * size, dtype=np.float64)
+        self._close = np.empty(2 * size, dtype=np.float64)
+        self._volume = np.empty(2 * size, dtype=np.float64)
+
+        # (column, KLINE_DTYPE field) pairs for batch writes
+        self._columns = (
+            (self._open_time, "open_time"),
+            (self._close_time, "close_time"),
+            (self._open, "open"),
+            (self._high, "high"),
+            (self._low, "low"),
+            (self._close, "close"),
+            (self._volume, "volume"),
+        )
+
+        # Next write slot and number of stored candles
+        self.head = 0
+        self.filled = 0
+
+    def __len__(self) -> int:
+        return self.filled
+
+    @property
+    def last_close_time(self) -> Optional[int]:
+        """
+        Close time (ms) of the latest stored candle.
+        """
+        if not self.filled:
+            return None
+        return int(self._close_time[self.head - 1 + self.size])
+
+    def append(
+        self,
+        open_time: int,
+        close_time: int,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> None:
+        """
+        Store one candle, overwriting the oldest when full.
+        """
+        for i in (self.head, self.head + self.size):
+            self._open_time[i] = open_time
+            self._close_time[i] = close_time
+            self._open[i] = open_
+            self._high[i] = high
+            self._low[i] = low
+            self._close[i] = close
+            self._volume[i] = volume
+
+        self.head = (self.head + 1) % self.size
+        self.filled = min(self.filled + 1, self.size)
+
+    def extend(self, rows: np.ndarray) -> None:
+        """
+        Store a batch of KLINE_DTYPE rows (oldest first),
+        overwriting the oldest candles when full.
+        """
+        n = len(rows)
+        if n == 0:
+            return
+
+        if n > self.size:
+            rows = rows[-self.size:]
+            n = self.size
+
+        slots = (self.head + np.arange(n)) % self.size
+        for column, field in self._columns:
+            column[slots] = rows[field]
+            column[slots + self.size] = rows[field]
+
+        self.head = (self.head + n) % self.size
+        self.filled = min(self.filled + n, self.size)
+
+    def append_candle(self, candle: Dict) -> bool:
+        """
+        Store a normalized candle dict if it is newer than the
+        latest stored candle. Returns True if it was stored.
+        """
+        close_time = to_timestamp_ms(candle["close_time"])
+
+        last = self.last_close_time
+        if last is not None and close_time <= last:
+            return False
+
+        self.append(
+            to_timestamp_ms(candle["open_time"]),
+            close_time,
+            candle["open"],
+            candle["high"],
+            candle["low"],
+            candle["close"],
+            candle["volume"],
+        )
+        return True
+
+    def _view(self, column: np.ndarray) -> np.ndarray:
+        if self.filled < self.size:
+            return column[:self.filled]
+        return column[self.head:self.head + self.size]
+
+    # Chronological (oldest first) zero-copy column views
+
+    @property
+    def opens(self) -> np.ndarray:
+        return self._view(self._open)
+
+    @property
+    def highs(self) -> np.ndarray:
+        return self._view(self._high)
+
+    @property
+    def lows(self) -> np.ndarray:
+        return self._view(self._low)
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self._view(self._close)
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self._view(self._volume)
+
+    @property
+    def close_times(self) -> np.ndarray:
+        return self._view(self._close_time)
+
+    def latest(self) -> Dict:
+        """
+        Latest stored candle as a normalized candle dict.
+        """
+        i = self.head - 1 + self.size
+        return {
+            "open_time": to_utc_datetime(int(self._open_time[i])),
+            "close_time": to_utc_datetime(int(self._close_time[i])),
+            "open": float(self._open[i]),
+            "high": float(self._high[i]),
+            "low": float(self._low[i]),
+            "close": float(self._close[i]),
+            "volume": float(self._volume[i]),
+        }
+
+
+# ==============================
+# CSV Utilities
+# ==============================
+
+CSV_FIELDS = [
+    "trade_id",
+    "symbol",
+    "direction",
+    "entry_time",
+    "entry_price",
+    "exit_time",
+    "exit_price",
+    "bars_held",
+    "environment",
+]
+
+
+@dataclass(slots=True)
+class Trade:
+    """
+    One LONG trade, filled in at entry and completed at exit.
+    """
+
+    trade_id: str
+    symbol: str
+    direction: str
+    entry_time: Optional[datetime] = None
+    entry_price: Optional[float] = None
+    quantity: Optional[float] = None
+    exit_time: Optional[datetime] = None
+    exit_price: Optional[float] = None
+    bars_held: Optional[int] = None
+    environment: Optional[str] = None
+
+
+# Immutable completed-trade row, fields in CSV column order
+TradeRecord = namedtuple("TradeRecord", CSV_FIELDS)
+
+
+def trade_to_record(trade: Trade) -> TradeRecord:
+    """
+    Freeze a completed trade into a CSV-ready TradeRecord.
+
+    Called once when the trade closes; timestamps are formatted here
+    so writing the record needs no further conversion.
+    """
+    return TradeRecord(
+        trade.trade_id,
+        trade.symbol,
+        trade.direction,
+        trade.entry_time.isoformat() if trade.entry_time else None,
+        trade.entry_price,
+        trade.exit_time.isoformat() if trade.exit_time else None,
+        trade.exit_price,
+        trade.bars_held,
+        trade.environment,
+    )
+
+
+def open_trades_csv(
+    file_path: str,
+    buffering: int = 1 << 16,
+) -> Tuple[TextIO, Any]:
+    """
+    Open a trades CSV for appending and return (file, writer).
+
+    The file is opened once with a large write buffer; the caller
+    decides when to flush. The header is written only if the file
+    is new or empty. The caller owns the file handle and must close it.
+    """
+    csvfile = open(file_path, mode="a", newline="", buffering=buffering)
+    writer = csv.writer(csvfile)
+
+    if csvfile.tell() == 0:
+        writer.writerow(CSV_FIELDS)
+        csvfile.flush()
+
+    return csvfile, writer
+
+
+def write_trades_to_csv(file_path: str, trades: List[TradeRecord]) -> None:
+    """
+    Append a batch of completed trades to a CSV file.
+
+    All rows are written with a single writerows call, e.g. when
+    exporting the trades of a backtest or replay run.
+
+    This function is NON-FATAL:
+    - CSV write failures must never crash live trading.
+    """
+    if not trades:
+        return
+
+    try:
+        csvfile, writer = open_trades_csv(file_path)
+        with csvfile:
+            writer.writerows(trades)
+
+    except Exception as e:
+        # Intentionally swallow exceptions to avoid crashing live trading
+        print(f"[WARN] Failed to write trades to CSV: {e}")
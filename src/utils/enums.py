@@ -0,0 +1,22 @@
+from enum import IntEnum
+
+
+class Side(IntEnum):
+    """
+    Strategy signal / order side.
+
+    Values are small contiguous integers so they can index
+    dispatch tables directly. Only BUY and SELL are valid
+    order sides.
+    """
+
+    BUY = 0
+    SELL = 1
+    NONE = 2
+
+
+# Plain-int signal codes with the same values as Side, for hot paths
+# and JIT-compiled code that cannot return enum members
+SIG_BUY = int(Side.BUY)
+SIG_SELL = int(Side.SELL)
+SIG_NONE = int(Side.NONE)
@@ -1,57 +1,72 @@
-import logging
-import sys
-from datetime import datetime, timezone
-
-from config.config import LOG_LEVEL
-
-
-class UTCFormatter(logging.Formatter):
-    """
-    Custom logging formatter enforcing UTC timestamps.
-    """
-
-    def formatTime(self, record, datefmt=None):
-        dt = datetime.fromtimestamp(record.created, tz=timezone.utc)
-        if datefmt:
-            return dt.strftime(datefmt)
-        return dt.isoformat()
-
-
-_LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
-
-_LEVEL_MAP = {
-    "DEBUG": logging.DEBUG,
-    "INFO": logging.INFO,
-    "WARNING": logging.WARNING,
-    "ERROR": logging.ERROR,
-}
-
-
-def get_logger(name: str) -> logging.Logger:
-    """
-    Return a configured logger with UTC timestamps.
-
-    Log level is controlled centrally via config.LOG_LEVEL.
-    """
-
-    logger = logging.getLogger(name)
-
-    # Prevent duplicate handlers if logger is requested multiple times
-    if logger.handlers:
-        return logger
-
-    level = _LEVEL_MAP.get(LOG_LEVEL, logging.INFO)
-
-    logger.setLevel(level)
-    logger.propagate = False
-
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(level)
-
-    formatter = UTCFormatter(_LOG_FORMAT, _DATE_FORMAT)
-    handler.setFormatter(formatter)
-
-    logger.addHandler(handler)
-
-    return logger
+import logging
+import sys
+from datetime import datetime, timezone
+
+from config.config import LOG_LEVEL
+
+
+class UTCFormatter(logging.Formatter):
+    """
+    Custom logging formatter enforcing UTC timestamps.
+
+    With a second-resolution `datefmt` the formatted timestamp is
+    cached per second, so bursts of records share one strftime.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, datefmt, formatted) of the last formatted record
+        self._time_cache = (None, None, "")
+
+    def formatTime(self, record, datefmt=None):
+        # isoformat() and %f carry sub-second precision: never cached
+        if not datefmt or "%f" in datefmt:
+            dt = datetime.fromtimestamp(record.created, tz=timezone.utc)
+            return dt.strftime(datefmt) if datefmt else dt.isoformat()
+
+        sec = int(record.created)
+        cached_sec, cached_fmt, cached_str = self._time_cache
+        if sec == cached_sec and datefmt == cached_fmt:
+            return cached_str
+
+        formatted = datetime.fromtimestamp(sec, tz=timezone.utc).strftime(
+            datefmt
+        )
+        self._time_cache = (sec, datefmt, formatted)
+        return formatted
+
+
+_LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_LEVEL_MAP = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+
+# Resolved once at import; every logger shares one handler/formatter
+_LEVEL = _LEVEL_MAP.get(LOG_LEVEL, logging.INFO)
+
+_SHARED_HANDLER = logging.StreamHandler(sys.stdout)
+_SHARED_HANDLER.setLevel(_LEVEL)
+_SHARED_HANDLER.setFormatter(UTCFormatter(_LOG_FORMAT, _DATE_FORMAT))
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a configured logger with UTC timestamps.
+
+    Log level is controlled centrally via config.LOG_LEVEL.
+    """
+
+    logger = logging.getLogger(name)
+
+    # Prevent duplicate handlers if logger is requested multiple times
+    if not logger.handlers:
+        logger.addHandler(_SHARED_HANDLER)
+        logger.setLevel(_LEVEL)
+        logger.propagate = False
+
+    return logger
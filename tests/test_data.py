@@ -0,0 +1,208 @@
+import csv
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.utils.data import (
+    CSV_FIELDS,
+    CandleBuffer,
+    Trade,
+    normalize_klines,
+    to_utc_datetime,
+    trade_to_record,
+    write_trades_to_csv,
+)
+
+
+def _raw(i):
+    # Raw REST kline for candle `i`: close == i, one-minute bars
+    return [
+        i * 60_000, str(i - 0.5), str(i + 1.0), str(i - 1.0), str(float(i)),
+        "10.0", i * 60_000 + 59_999, "0", 0, "0", "0", "0",
+    ]
+
+
+def _rows(start, n):
+    return normalize_klines([_raw(i) for i in range(start, start + n)])
+
+
+def _candle(i):
+    return {
+        "open_time": to_utc_datetime(i * 60_000),
+        "close_time": to_utc_datetime(i * 60_000 + 59_999),
+        "open": i - 0.5,
+        "high": i + 1.0,
+        "low": i - 1.0,
+        "close": float(i),
+        "volume": 10.0,
+    }
+
+
+def _assert_holds(buf, first, last):
+    expected = np.arange(first, last + 1, dtype=np.float64)
+    np.testing.assert_array_equal(buf.closes, expected)
+    np.testing.assert_array_equal(buf.opens, expected - 0.5)
+    np.testing.assert_array_equal(
+        buf.close_times, expected.astype(np.int64) * 60_000 + 59_999
+    )
+    assert len(buf) == len(expected)
+    assert buf.last_close_time == last * 60_000 + 59_999
+    assert buf.latest()["close"] == last
+
+
+def _record(n):
+    trade = Trade(
+        trade_id=f"T{n:03d}",
+        symbol="ETHUSDT",
+        direction="LONG",
+        entry_time=datetime(2024, 1, 1, n, tzinfo=timezone.utc),
+        entry_price=100.0 + n,
+        quantity=0.01,
+        exit_time=datetime(2024, 1, 1, n, 30, tzinfo=timezone.utc),
+        exit_price=101.0 + n,
+        bars_held=6,
+        environment="DRY_RUN",
+    )
+    return trade_to_record(trade)
+
+
+# ==================================================
+# Kline parsing
+# ==================================================
+
+def test_normalize_klines_parses_columns():
+    rows = normalize_klines([_raw(3), _raw(4)])
+
+    assert rows.dtype.names == (
+        "open_time", "close_time", "open", "high", "low", "close", "volume"
+    )
+    assert rows["open_time"].tolist() == [180_000, 240_000]
+    assert rows["close_time"].tolist() == [239_999, 299_999]
+    assert rows["open"].tolist() == [2.5, 3.5]
+    assert rows["high"].tolist() == [4.0, 5.0]
+    assert rows["low"].tolist() == [2.0, 3.0]
+    assert rows["close"].tolist() == [3.0, 4.0]
+    assert rows["volume"].tolist() == [10.0, 10.0]
+
+
+def test_normalize_klines_empty_batch():
+    rows = normalize_klines([])
+
+    assert len(rows) == 0
+    assert rows.dtype.names[1] == "close_time"
+
+
+# ==================================================
+# CandleBuffer
+# ==================================================
+
+def test_empty_buffer():
+    buf = CandleBuffer(size=4)
+
+    assert len(buf) == 0
+    assert buf.last_close_time is None
+    assert len(buf.closes) == 0
+
+
+def test_append_wraps_around():
+    buf = CandleBuffer(size=4)
+    for i in range(1, 7):
+        buf.append(*_rows(i, 1)[0].tolist())
+
+    _assert_holds(buf, 3, 6)
+
+
+def test_extend_short_batches_wrap_around():
+    buf = CandleBuffer(size=4)
+
+    buf.extend(_rows(1, 3))
+    _assert_holds(buf, 1, 3)
+
+    buf.extend(_rows(4, 3))
+    _assert_holds(buf, 3, 6)
+
+
+def test_extend_oversized_batch_keeps_newest():
+    buf = CandleBuffer(size=4)
+    buf.extend(_rows(1, 2))
+
+    buf.extend(_rows(3, 9))
+
+    _assert_holds(buf, 8, 11)
+
+
+def test_extend_empty_batch_is_noop():
+    buf = CandleBuffer(size=4)
+    buf.extend(_rows(1, 3))
+
+    buf.extend(_rows(4, 0))
+
+    _assert_holds(buf, 1, 3)
+
+
+def test_append_after_extend():
+    buf = CandleBuffer(size=4)
+    buf.extend(_rows(1, 3))
+
+    assert buf.append_candle(_candle(4))
+    assert buf.append_candle(_candle(5))
+
+    _assert_holds(buf, 2, 5)
+
+
+def test_append_candle_rejects_old_candles():
+    buf = CandleBuffer(size=4)
+    buf.extend(_rows(1, 3))
+
+    assert not buf.append_candle(_candle(3))
+    assert not buf.append_candle(_candle(2))
+
+    _assert_holds(buf, 1, 3)
+
+
+def test_views_are_zero_copy():
+    buf = CandleBuffer(size=4)
+    buf.extend(_rows(1, 6))
+
+    closes = buf.closes
+    assert closes.flags.c_contiguous
+    assert np.shares_memory(closes, buf._close)
+
+
+def _read_rows(path):
+    with open(path, newline="") as fh:
+        return list(csv.reader(fh))
+
+
+# ==================================================
+# Trades CSV
+# ==================================================
+
+def test_write_trades_to_csv_writes_header_once(tmp_path):
+    path = tmp_path / "trades.csv"
+
+    write_trades_to_csv(str(path), [_record(1), _record(2)])
+    write_trades_to_csv(str(path), [_record(3)])
+
+    rows = _read_rows(path)
+    assert rows[0] == CSV_FIELDS
+    assert [row[0] for row in rows[1:]] == ["T001", "T002", "T003"]
+    assert rows[1][3] == "2024-01-01T01:00:00+00:00"
+    assert rows[1][5] == "2024-01-01T01:30:00+00:00"
+
+
+def test_write_trades_to_csv_skips_empty_batch(tmp_path):
+    path = tmp_path / "trades.csv"
+
+    write_trades_to_csv(str(path), [])
+
+    assert not path.exists()
+
+
+def test_write_trades_to_csv_is_non_fatal(tmp_path, capsys):
+    path = tmp_path / "missing" / "trades.csv"
+
+    write_trades_to_csv(str(path), [_record(1)])
+
+    assert not path.exists()
+    assert "Failed to write trades to CSV" in capsys.readouterr().out
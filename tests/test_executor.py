@@ -0,0 +1,244 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from config.config import ENTRY_TIMEFRAME, STRATEGY_PARAMS
+from src.execution import executor
+from src.utils.data import (
+    INTERVAL_MS,
+    Trade,
+    normalize_klines,
+    to_utc_datetime,
+)
+from src.utils.enums import Side
+
+
+BASE_MS = 1_577_836_800_000  # 2020-01-01, every candle is long closed
+IV = INTERVAL_MS[ENTRY_TIMEFRAME]
+EXIT_BARS = STRATEGY_PARAMS["exit_bars"]
+
+CLOSES = 100.0 + np.cumsum(np.random.default_rng(3).normal(0.0, 1.0, 1000))
+
+
+def _raw(i):
+    open_time = BASE_MS + i * IV
+    return [
+        open_time, str(CLOSES[i] - 0.1), "0", "0", str(CLOSES[i]),
+        "1.0", open_time + IV - 1, "0", 0, "0", "0", "0",
+    ]
+
+
+def _stream_candle(i):
+    open_time = BASE_MS + i * IV
+    return {
+        "open_time": to_utc_datetime(open_time),
+        "close_time": to_utc_datetime(open_time + IV - 1),
+        "open": CLOSES[i] - 0.1,
+        "high": 0.0,
+        "low": 0.0,
+        "close": CLOSES[i],
+        "volume": 1.0,
+    }
+
+
+class FakeExchange:
+    """
+    REST stand-in serving candles 0 .. available-1, paged like Binance:
+    the newest `limit` without `start_time`, else the oldest `limit`
+    opening at or after it.
+    """
+
+    def __init__(self):
+        self.available = 0
+        self.orders = []
+
+    async def fetch_klines_into(
+        self, buffer, interval, limit=200, start_time=None
+    ):
+        if start_time is None:
+            first = max(self.available - limit, 0)
+        else:
+            first = -(-(start_time - BASE_MS) // IV)
+        last = min(first + limit, self.available)
+
+        rows = normalize_klines([_raw(i) for i in range(first, last)])
+        if buffer.last_close_time is not None:
+            rows = rows[rows["close_time"] > buffer.last_close_time]
+
+        buffer.extend(rows)
+        return len(rows)
+
+    async def place_market_order(self, side, quantity):
+        self.orders.append(side)
+        return {"price": 1.0, "executed_qty": quantity}
+
+
+@pytest.fixture
+def bot(monkeypatch, tmp_path):
+    monkeypatch.setattr(executor, "BinanceSpotExchange", FakeExchange)
+    monkeypatch.setattr(
+        executor, "LIVE_TRADES_CSV", str(tmp_path / "trades.csv")
+    )
+    monkeypatch.setattr(executor, "_GAP_RETRY_MS", 0)
+
+    bot = executor.LiveTradingExecutor()
+    logic = bot.logic
+    bot.ticks = []
+    bot.missed = []
+
+    on_bar_tick = logic.on_bar_tick
+    on_missed_bar = logic.on_missed_bar
+
+    def tick(open_px, close_px, in_position):
+        bot.ticks.append(float(close_px))
+        return on_bar_tick(open_px, close_px, in_position)
+
+    def missed(close_px, in_position):
+        bot.missed.append(float(close_px))
+        on_missed_bar(close_px, in_position)
+
+    monkeypatch.setattr(logic, "on_bar_tick", tick)
+    monkeypatch.setattr(logic, "on_missed_bar", missed)
+    yield bot
+    if bot._trades_fp is not None:
+        bot._trades_fp.close()
+
+
+def _warm_up(bot, n=200):
+    bot.exchange.available = n
+    asyncio.run(bot._warm_up())
+    assert bot.logic._closes_seen == min(n, bot.candles.size)
+
+
+def _enter_position(bot):
+    bot.in_position = True
+    bot.bars_in_trade = 0
+    bot.logic.bars_in_trade = 0
+    bot.current_trade = Trade(trade_id="T001", symbol="X", direction="LONG")
+
+
+# ==================================================
+# REST catch-up
+# ==================================================
+
+def test_catch_up_without_new_candles(bot):
+    _warm_up(bot)
+
+    assert asyncio.run(bot._catch_up()) is False
+    assert bot.ticks == [] and bot.missed == []
+
+
+def test_catch_up_acts_on_next_candle(bot):
+    _warm_up(bot)
+    bot.exchange.available = 201
+
+    assert asyncio.run(bot._catch_up()) is True
+    assert bot.ticks == [CLOSES[200]]
+    assert bot.missed == []
+    assert bot.logic.bar_index == 1
+
+
+def test_catch_up_pages_through_a_long_gap(bot):
+    _warm_up(bot)
+    # 501 new candles: three pages of up to 200 from startTime
+    bot.exchange.available = 701
+
+    asyncio.run(bot._catch_up())
+
+    # Every missed bar is fed once, in order; only the newest is acted on
+    assert bot.missed == CLOSES[200:700].tolist()
+    assert bot.ticks == [CLOSES[700]]
+    assert bot.logic._closes_seen == 701
+    assert bot.logic.bar_index == 501
+    assert bot.candles.last_close_time == _raw(700)[6]
+
+
+def test_catch_up_seeds_when_nothing_was_warmed_up(bot):
+    bot.exchange.available = 300
+
+    asyncio.run(bot._catch_up())
+
+    # History is seeded (not fed as missed bars), newest is acted on
+    assert bot.missed == []
+    assert bot.ticks == [CLOSES[299]]
+    assert bot.logic._closes_seen == 200
+    assert bot.logic.bar_index == 1
+
+
+def test_gap_counts_toward_time_exit(bot):
+    _warm_up(bot)
+    _enter_position(bot)
+
+    # Fewer missed bars than exit_bars: still holding afterwards
+    bot.exchange.available = 200 + EXIT_BARS - 2
+    asyncio.run(bot._catch_up())
+    assert bot.exchange.orders == []
+    assert bot.bars_in_trade == EXIT_BARS - 2
+
+    # The exit came due during the gap; it fires on the newest bar
+    bot.exchange.available = 200 + 2 * EXIT_BARS
+    asyncio.run(bot._catch_up())
+
+    assert bot.exchange.orders == [Side.SELL]
+    assert bot.in_position is False
+    trade = bot.trades[-1]
+    assert trade.bars_held == 2 * EXIT_BARS - 1
+    assert trade.exit_time == (
+        to_utc_datetime(_raw(199 + 2 * EXIT_BARS)[6]).isoformat()
+    )
+
+
+# ==================================================
+# Stream gaps
+# ==================================================
+
+def test_stream_next_candle_is_acted_on(bot):
+    _warm_up(bot)
+
+    asyncio.run(bot._on_kline(_stream_candle(200)))
+    asyncio.run(bot._on_kline(_stream_candle(200)))  # duplicate
+
+    assert bot.ticks == [CLOSES[200]]
+    assert bot.missed == []
+
+
+def test_stream_gap_is_backfilled_first(bot):
+    _warm_up(bot, 311)
+    bot.exchange.available = 320  # REST has every bar before 320
+
+    asyncio.run(bot._on_kline(_stream_candle(320)))
+
+    assert bot.missed == CLOSES[311:320].tolist()
+    assert bot.ticks == [CLOSES[320]]
+    assert bot.candles.last_close_time == _raw(320)[6]
+
+
+def test_stream_gap_when_rest_has_the_streamed_candle(bot):
+    _warm_up(bot, 311)
+    bot.exchange.available = 321
+
+    asyncio.run(bot._on_kline(_stream_candle(320)))
+
+    assert bot.missed == CLOSES[311:320].tolist()
+    assert bot.ticks == [CLOSES[320]]
+
+
+def test_stream_gap_waits_for_lagging_rest(bot):
+    _warm_up(bot, 311)
+    bot.exchange.available = 316  # REST stops at 315
+
+    asyncio.run(bot._on_kline(_stream_candle(320)))
+
+    # 316-319 are still missing: 320 is neither stored nor acted on
+    assert bot.missed == CLOSES[311:316].tolist()
+    assert bot.ticks == []
+    assert bot.candles.last_close_time == _raw(315)[6]
+
+    # Once REST catches up, the next candle recovers the whole gap
+    bot.exchange.available = 321
+    asyncio.run(bot._on_kline(_stream_candle(321)))
+
+    assert bot.missed == CLOSES[311:321].tolist()
+    assert bot.ticks == [CLOSES[321]]
+    assert bot.logic.bar_index == 11
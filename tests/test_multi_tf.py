@@ -0,0 +1,180 @@
+import numpy as np
+import pytest
+
+from src.strategy import multi_tf
+from src.strategy.multi_tf import MultiTFTrendPullbackLogic
+
+
+PARAMS = dict(
+    entry_ema=20,
+    rsi_period=14,
+    rsi_entry=50,
+    confirm_ema_fast=5,
+    confirm_ema_slow=10,
+    exit_bars=3,
+    confirm_tf_multiple=4,
+)
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    closes = 100.0 + np.cumsum(rng.normal(0.0, 1.0, 400))
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    return opens, closes
+
+
+def _reference_ema(values, period):
+    ema_val = sum(values[:period]) / period
+    alpha = 2 / (period + 1)
+    for v in values[period:]:
+        ema_val = alpha * v + (1 - alpha) * ema_val
+    return ema_val
+
+
+def _reference_rsi(values, period):
+    deltas = [b - a for a, b in zip(values[:-1], values[1:])]
+    gains = [max(d, 0.0) for d in deltas]
+    losses = [max(-d, 0.0) for d in deltas]
+
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+
+    if avg_loss == 0:
+        return 100.0
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+# ==================================================
+# Indicator helpers
+# ==================================================
+
+def test_ema_is_sma_seeded(prices):
+    _, closes = prices
+    values = closes.tolist()
+
+    assert MultiTFTrendPullbackLogic.ema(values[:19], 20) is None
+    # Exactly `period` values: the EMA is the plain SMA seed
+    assert MultiTFTrendPullbackLogic.ema(values[:20], 20) == pytest.approx(
+        sum(values[:20]) / 20
+    )
+    assert MultiTFTrendPullbackLogic.ema(values, 20) == pytest.approx(
+        _reference_ema(values, 20)
+    )
+
+
+def test_rsi_is_wilder_smoothed(prices):
+    _, closes = prices
+    values = closes.tolist()
+
+    assert MultiTFTrendPullbackLogic.rsi(values[:14], 14) is None
+    assert MultiTFTrendPullbackLogic.rsi(values, 14) == pytest.approx(
+        _reference_rsi(values, 14)
+    )
+
+
+def test_rsi_without_losses_is_100():
+    values = [float(v) for v in range(1, 30)]
+    assert MultiTFTrendPullbackLogic.rsi(values, 14) == 100.0
+
+
+def test_on_close_matches_helpers(prices):
+    _, closes = prices
+    logic = MultiTFTrendPullbackLogic(**PARAMS)
+
+    for i, close in enumerate(closes.tolist(), start=1):
+        logic.on_close(close)
+
+        ema_val = MultiTFTrendPullbackLogic.ema(closes[:i], 20)
+        rsi_val = MultiTFTrendPullbackLogic.rsi(closes[:i], 14)
+        if ema_val is None:
+            assert logic._entry_ema_state is None
+        else:
+            assert logic._entry_ema_state == pytest.approx(ema_val)
+        if rsi_val is None:
+            assert logic._current_rsi() is None
+        else:
+            assert logic._current_rsi() == pytest.approx(rsi_val)
+
+
+@pytest.mark.parametrize("n", [5, 21, 400])
+def test_seed_matches_on_close(prices, n):
+    _, closes = prices
+    closes = np.ascontiguousarray(closes[:n])
+
+    seeded = MultiTFTrendPullbackLogic(**PARAMS)
+    seeded.seed(closes)
+
+    stepped = MultiTFTrendPullbackLogic(**PARAMS)
+    for close in closes.tolist():
+        stepped.on_close(close)
+
+    assert seeded._closes_seen == stepped._closes_seen == n
+    assert seeded._prev_close == stepped._prev_close
+    assert seeded._rsi_seeded == stepped._rsi_seeded
+    assert seeded._entry_ema_state == pytest.approx(stepped._entry_ema_state)
+    assert seeded._current_rsi() == pytest.approx(stepped._current_rsi())
+
+
+# ==================================================
+# Incremental state vs precompute()
+# ==================================================
+
+@pytest.fixture(params=["loop", "lfilter"])
+def ema_branch(request, monkeypatch):
+    if request.param == "lfilter":
+        pytest.importorskip("scipy")
+        assert multi_tf.lfilter is not None
+    else:
+        monkeypatch.setattr(multi_tf, "lfilter", None)
+    return request.param
+
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
+
+
+def test_on_bar_tick_matches_precompute(prices, ema_branch):
+    opens, closes = prices
+    logic = MultiTFTrendPullbackLogic(**PARAMS)
+    series = logic.precompute(opens, closes)
+
+    for i, (open_px, close_px) in enumerate(
+        zip(opens.tolist(), closes.tolist())
+    ):
+        logic.on_bar_tick(open_px, close_px, in_position=False)
+
+        np.testing.assert_allclose(
+            _nan_if_none(logic._entry_ema_state), series["entry_ema"][i]
+        )
+        np.testing.assert_allclose(
+            _nan_if_none(logic._current_rsi()), series["rsi"][i]
+        )
+        np.testing.assert_allclose(
+            _nan_if_none(logic._htf_fast_state), series["htf_fast"][i]
+        )
+        np.testing.assert_allclose(
+            _nan_if_none(logic._htf_slow_state), series["htf_slow"][i]
+        )
+        assert series["bullish"][i] == (close_px > open_px)
+
+
+def test_seeded_ticks_match_precompute(prices, ema_branch):
+    opens, closes = prices
+    warm_up = 50
+    logic = MultiTFTrendPullbackLogic(**PARAMS)
+    series = logic.precompute(opens, closes)
+
+    # History fed through seed() does not advance the HTF trend, so
+    # only the entry indicators are comparable here
+    logic.seed(np.ascontiguousarray(closes[:warm_up]))
+    for i in range(warm_up, len(closes)):
+        logic.on_bar_tick(opens[i], closes[i], in_position=False)
+
+        np.testing.assert_allclose(
+            logic._entry_ema_state, series["entry_ema"][i]
+        )
+        np.testing.assert_allclose(logic._current_rsi(), series["rsi"][i])